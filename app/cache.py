@@ -0,0 +1,218 @@
+import functools
+import gzip
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from fastapi import Response
+
+# Safety net: even without an invalidation (e.g. a write made by another instance), cached data expires after this
+FEED_CACHE_TTL = float(os.environ.get("FEED_CACHE_TTL", 300))
+
+# Rendered public pages: expiry (safety net, like the feed) and memory bound for the compressed bodies
+PAGE_CACHE_TTL = float(os.environ.get("PAGE_CACHE_TTL", 300))
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("PAGE_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+# Tables whose rows make up the home page sections (get_home_items)
+FEED_TABLES = {"news", "seminars", "workshops"}
+
+# Tables whose rows feed the people autocomplete index (app/names.py)
+NAME_TABLES = {"members", "seminars", "contacts"}
+
+class TTLCache:
+    """
+    Small in-process cache. Entries expire after ttl seconds or when the cache is invalidated.
+    The generation counter guards against a race: a value built from data read before an
+    invalidation is not stored after it (see set()).
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = {}  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, generation=None):
+        """Stores value; if generation is given and an invalidation happened since, the value is dropped."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._items[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.generation += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "items": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+            "ttl": self.ttl,
+        }
+
+feed_cache = TTLCache(FEED_CACHE_TTL)
+name_cache = TTLCache(FEED_CACHE_TTL)
+
+class PageCache:
+    """
+    Rendered HTML responses keyed by path (+ query string), stored gzip-compressed.
+    Each entry carries tags (e.g. "news:list", "news:<slug>"); purge(tag) drops every page built from that entity.
+    Bounded by total compressed size, least recently used pages are evicted first.
+    """
+    def __init__(self, ttl, max_bytes):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # key -> (expires_at, status, media_type, headers, gzipped body, tags)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, response, tags, generation, ttl=None):
+        """ttl (seconds) shortens the expiry of this entry below the cache's ttl."""
+        body = gzip.compress(response.body, compresslevel=6)
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-length", "content-encoding")}
+        with self._lock:
+            if generation != self.generation or len(body) > self.max_bytes:
+                return  # content changed while rendering, or too big to be worth it
+            if key in self._items:
+                self._remove(key)
+            expires_at = time.monotonic() + (self.ttl if ttl is None else min(ttl, self.ttl))
+            self._items[key] = (expires_at, response.status_code, response.media_type, headers, body, tags)
+            self.size += len(body)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._items)))
+
+    def purge(self, *tags):
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._items:
+                        self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._items.clear()
+            self._tags.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        entry = self._items.pop(key)
+        self.size -= len(entry[4])
+        for tag in entry[5]:
+            keys = self._tags.get(tag)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "items": len(self._items),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+            "ttl": self.ttl,
+        }
+
+page_cache = PageCache(PAGE_CACHE_TTL, PAGE_CACHE_MAX_BYTES)
+
+def expire_page_at(request, when):
+    """
+    For time-dependent pages (e.g. upcoming events): cached_page keeps this response at most until
+    when (an aware datetime, None = no limit). Several calls keep the earliest.
+    """
+    if when is None:
+        return
+    current = getattr(request.state, "page_expires_at", None)
+    request.state.page_expires_at = when if current is None else min(current, when)
+
+def cached_page(*tags):
+    """
+    Route decorator: serve the rendered page from page_cache, render and store it on a miss.
+    Tags may name path parameters, e.g. @cached_page("news:{slug}").
+    Admin sessions always bypass the cache (they see pending items and admin links).
+    Pages that change with the clock call expire_page_at() so they are not served past that point.
+    The route must take `request`; its db dependency is only used on a miss (connections are acquired lazily).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            request = kwargs["request"]
+            if request.method != "GET" or request.session.get("user"):
+                return await fn(*args, **kwargs)
+
+            key = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+            entry = page_cache.get(key)
+            if entry is not None:
+                _, status, media_type, headers, body, _ = entry
+                if "gzip" in request.headers.get("accept-encoding", ""):
+                    headers = {**headers, "Content-Encoding": "gzip"}
+                else:
+                    body = gzip.decompress(body)
+                return Response(content=body, status_code=status, media_type=media_type,
+                                headers={**headers, "Vary": "Accept-Encoding", "X-Cache": "HIT"})
+
+            generation = page_cache.generation
+            response = await fn(*args, **kwargs)
+            if response.status_code == 200 and "set-cookie" not in response.headers:
+                ttl = None
+                expires_at = getattr(request.state, "page_expires_at", None)
+                if expires_at is not None:
+                    ttl = max(0, (expires_at - datetime.now(timezone.utc)).total_seconds())
+                page_cache.set(key, response, [t.format(**request.path_params) for t in tags], generation, ttl)
+                response.headers["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
+
+def invalidate_content(table, key=None):
+    """
+    Call after a content row is inserted, approved, edited or deleted (once the change is committed).
+    key is the row's slug or id: pages tagged "<table>:<key>" and "<table>:list" are purged.
+    The feed and the name index are rebuilt as a whole.
+    """
+    if table in FEED_TABLES:
+        feed_cache.clear()
+    if table in NAME_TABLES:
+        name_cache.clear()
+    tags = [f"{table}:list"]
+    if key is not None:
+        tags.append(f"{table}:{key}")
+    page_cache.purge(*tags)
@@ -1,24 +1,317 @@
 import sqlite3
 import os
+import asyncio
+import base64
+import functools
+import queue
+import random
+import threading
+import time
 import libsql
+import requests
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = BASE_DIR.parent / "db" / "glimprint.db"
 
-def dict_factory(cursor, row):
+# Pool sizing. On Vercel a warm function instance keeps its pool between invocations,
+# so even a small pool saves the Turso TLS handshake + auth on every request.
+POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+POOL_IDLE_TIMEOUT = float(os.environ.get("DB_POOL_IDLE_TIMEOUT", 300))  # seconds before an idle connection is closed
+POOL_HEALTH_CHECK_AFTER = float(os.environ.get("DB_POOL_HEALTH_CHECK_AFTER", 30))  # ping connections idle longer than this
+POOL_ACQUIRE_TIMEOUT = float(os.environ.get("DB_POOL_ACQUIRE_TIMEOUT", 30))
+
+# Replica mode: serve reads from a local SQLite file synced from the primary (see ReplicaConnection)
+REPLICA_PATH = os.environ.get("DB_REPLICA_PATH")
+REPLICA_SYNC_INTERVAL = float(os.environ.get("DB_REPLICA_SYNC_INTERVAL", 60))  # seconds; 0 = only sync on demand / after writes
+
+# Blocking sqlite3/libsql calls run on this many worker threads, never on the event loop
+DB_MAX_WORKERS = int(os.environ.get("DB_MAX_WORKERS", POOL_MAX_SIZE))
+
+# Writes to the local SQLite database go through one writer thread (see WriteQueue); 0 = each request
+# writes and commits on its own connection, as on Turso
+WRITE_QUEUE_ENABLED = os.environ.get("DB_WRITE_QUEUE", "1") == "1"
+WRITE_BATCH_MAX = int(os.environ.get("DB_WRITE_BATCH_MAX", 32))  # writes per group commit
+WRITE_RETRIES = int(os.environ.get("DB_WRITE_RETRIES", 5))  # retries of a batch that hit SQLITE_BUSY
+WRITE_BACKOFF = float(os.environ.get("DB_WRITE_BACKOFF", 0.01))  # seconds before the first retry, doubled each time
+
+# Batches of reads (run_batch) go to Turso as one HTTP request; seconds before it gives up
+TURSO_HTTP_TIMEOUT = float(os.environ.get("TURSO_HTTP_TIMEOUT", 10))
+
+# Storage profile of the local SQLite database (not used on Turso): PRAGMAs applied once to each new
+# connection the pool opens. WAL lets readers run while a submission is being written and, with
+# busy_timeout, makes concurrent writers wait for the lock instead of failing with "database is locked".
+# synchronous=NORMAL is safe in WAL mode (a power cut can lose the last commits, never corrupt the file).
+# "tuned" adds a bigger page cache and mmap, which only pays off once the database outgrows the OS
+# page cache; on the current data it measured slower than plain "wal" (scripts/bench_sqlite_profiles.py).
+SQLITE_PROFILES = {
+    "default": {},  # library defaults: rollback journal, ~2 MB page cache, no mmap
+    "wal": {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000},
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+        "cache_size": -16000,  # KiB (negative = size, not pages): 16 MB per connection
+        "mmap_size": 128 * 1024 * 1024,
+    },
+}
+SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "wal")
+
+def sqlite_pragmas(profile=SQLITE_PROFILE, overrides=os.environ.get("SQLITE_PRAGMAS", "")):
+    """PRAGMAs of a profile, with "name=value,..." overrides (e.g. SQLITE_PRAGMAS="mmap_size=0")."""
+    if profile not in SQLITE_PROFILES:
+        print(f"Warning: Unknown SQLITE_PROFILE {profile!r}, using library defaults")
+    pragmas = dict(SQLITE_PROFILES.get(profile, {}))
+    for item in overrides.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            pragmas[name.strip()] = value.strip()
+    return pragmas
+
+SQLITE_PRAGMAS = sqlite_pragmas()
+
+def apply_pragmas(conn, pragmas=None):
+    """Applies a storage profile to a new sqlite3 connection. A PRAGMA that fails (e.g. WAL on a read-only directory) is skipped."""
+    for name, value in (SQLITE_PRAGMAS if pragmas is None else pragmas).items():
+        try:
+            conn.execute(f"PRAGMA {name} = {value}").fetchall()
+        except sqlite3.Error as e:
+            print(f"Warning: PRAGMA {name} = {value} failed: {e}")
+
+def column_index(description):
     """
-    Convert a database row to a dictionary.
-    This ensures compatibility with existing code that expects dict-like access.
+    Build the column name -> position map for a result set (once, shared by all its rows).
     """
-    d = {}
-    for idx, col in enumerate(cursor.description):
-        d[col[0]] = row[idx]
-    return d
+    return {col[0]: idx for idx, col in enumerate(description)}
 
-def get_db_connection():
+class Row:
+    """
+    Compact result row: the raw value tuple plus the column map shared by every row of the result set.
+    Behaves like sqlite3.Row: row['col'], row[0], dict(row), row.keys(); plus row.get('col').
+    """
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index, values):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._values[self._index[key]]
+        return self._values[key]
+
+    def get(self, key, default=None):
+        idx = self._index.get(key)
+        return default if idx is None else self._values[idx]
+
+    def keys(self):
+        return list(self._index)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, Row):
+            return self._index.keys() == other._index.keys() and self._values == other._values
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((tuple(self._index), self._values))
+
+    def __repr__(self):
+        return f"Row({dict(zip(self._index, self._values))!r})"
+
+
+# --- Batches ---
+# Pages that need several independent reads (the admin dashboard counts, the approvals queue, the
+# upcoming activities, the name index) send them with run_batch. On Turso every statement is otherwise a network round trip; the
+# libsql binding has no batch call that returns rows, so the statements go out as one Hrana pipeline
+# request (POST /v2/pipeline) to Turso's HTTP API.
+# On SQLite there is no round trip to save and they simply run one after another.
+
+def run_batch(conn, statements, return_exceptions=False):
+    """
+    Runs read statements (SQL strings or (sql, params) pairs) and returns one list of rows per statement.
+    With return_exceptions, a statement that fails gives its exception in place of its rows
+    (like asyncio.gather) instead of failing the whole batch.
+    """
+    statements = [(stmt, ()) if isinstance(stmt, str) else stmt for stmt in statements]
+    batch = getattr(conn, "batch", None)
+    if batch is not None:
+        results = batch(statements)
+    else:
+        results = []
+        for sql, params in statements:
+            try:
+                results.append(conn.execute(sql, params).fetchall())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    return results
+
+def hrana_value(value):
+    """Python value -> Hrana statement argument."""
+    if value is None:
+        return {"type": "null"}
+    if isinstance(value, int):  # bool included
+        return {"type": "integer", "value": str(int(value))}
+    if isinstance(value, float):
+        return {"type": "float", "value": value}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"type": "blob", "base64": base64.b64encode(bytes(value)).decode()}
+    return {"type": "text", "value": str(value)}
+
+def hrana_decode(value):
+    """Hrana result value -> Python value (as sqlite3 would return it)."""
+    kind = value["type"]
+    if kind == "integer":
+        return int(value["value"])
+    if kind == "float":
+        return float(value["value"])
+    if kind == "blob":
+        data = value["base64"]
+        return base64.b64decode(data + "=" * (-len(data) % 4))
+    if kind == "text":
+        return value["value"]
+    return None
+
+def hrana_pipeline_url(database_url):
+    """libsql://<db>.turso.io (or wss://, https://) -> the HTTP pipeline endpoint."""
+    for scheme, http_scheme in (("libsql://", "https://"), ("wss://", "https://"), ("ws://", "http://")):
+        if database_url.startswith(scheme):
+            database_url = http_scheme + database_url[len(scheme):]
+            break
+    return database_url.rstrip("/") + "/v2/pipeline"
+
+def hrana_pipeline(session, database_url, auth_token, statements):
+    """
+    Executes (sql, params) statements on Turso in a single HTTP request and returns one list of
+    Rows per statement, or a ValueError (what the libsql binding raises) for a statement that failed.
+    The statements run on a fresh stream, outside any transaction open on the libsql connection.
     """
-    Returns a database connection.
+    steps = [
+        {"type": "execute", "stmt": {"sql": sql, "args": [hrana_value(v) for v in params], "want_rows": True}}
+        for sql, params in statements
+    ]
+    steps.append({"type": "close"})
+    response = session.post(
+        hrana_pipeline_url(database_url),
+        json={"baton": None, "requests": steps},
+        headers={"Authorization": f"Bearer {auth_token}"},
+        timeout=TURSO_HTTP_TIMEOUT,
+    )
+    response.raise_for_status()
+    results = []
+    for item in response.json()["results"][:len(statements)]:
+        if item.get("type") != "ok":
+            results.append(ValueError((item.get("error") or {}).get("message", "statement failed")))
+            continue
+        result = item["response"]["result"]
+        index = {col.get("name"): idx for idx, col in enumerate(result["cols"])}
+        results.append([Row(index, tuple(hrana_decode(v) for v in row)) for row in result["rows"]])
+    return results
+
+
+# The `libsql` python binding is minimal: connections have no row_factory,
+# so we wrap the connection to hand out cursors that produce Row objects.
+
+class LibSQLConnectionWrapper:
+    def __init__(self, wrapped_conn, database_url=None, auth_token=None):
+        self.conn = wrapped_conn
+        # Set for remote (Turso) connections, which can send batches as one HTTP request
+        self.database_url = database_url
+        self.auth_token = auth_token
+        self._http = None
+
+    def cursor(self):
+        return LibSQLCursorWrapper(self.conn.cursor())
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        # libsql only takes tuples as parameters
+        return self.cursor().executemany(sql, [tuple(p) for p in seq_of_params])
+
+    def batch(self, statements):
+        """Runs (sql, params) read statements in one round trip; see run_batch."""
+        if self.database_url:
+            if self._http is None:
+                self._http = requests.Session()  # keeps the TLS connection alive between batches
+            try:
+                return hrana_pipeline(self._http, self.database_url, self.auth_token, statements)
+            except (requests.RequestException, KeyError, ValueError) as e:
+                print(f"Warning: Turso pipeline request failed, running the batch statement by statement: {e}")
+        results = []
+        for sql, params in statements:
+            try:
+                results.append(self.execute(sql, params).fetchall())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    @property
+    def in_transaction(self):
+        return self.conn.in_transaction
+
+    def close(self):
+        if self._http is not None:
+            self._http.close()
+        self.conn.close()
+
+class LibSQLCursorWrapper:
+    def __init__(self, wrapped_cursor):
+        self.cursor = wrapped_cursor
+
+    def execute(self, sql, params=()):
+        self.cursor.execute(sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self.cursor.executemany(sql, seq_of_params)
+        return self
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is None: return None
+        return Row(column_index(self.cursor.description), row)
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        if not rows: return []
+        # Read the column layout once per result set, not once per row
+        index = column_index(self.cursor.description)
+        return [Row(index, row) for row in rows]
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    @property
+    def lastrowid(self):
+        return self.cursor.lastrowid
+
+
+def _connect_primary():
+    """
+    Opens a new raw connection to the primary database.
     Principally tries to connect to Turso if environment variables are set.
     Falls back to local SQLite database if Turso is not configured or fails.
     """
@@ -29,99 +322,7 @@ def get_db_connection():
         try:
             # Connect to Turso using libsql
             conn = libsql.connect(database=turso_url, auth_token=turso_token)
-            
-            # libsql might not support row_factory directly on connection.
-            # We can rely on the fact that existing code likely uses fetches.
-            # However, if code expects dict-like objects from fetchone/fetchall, we need to ensure that.
-            # Let's wrap the connection to return a cursor that produces dicts.
-            
-            original_cursor = conn.cursor
-
-            def cursor_factory():
-                cur = original_cursor()
-                original_execute = cur.execute
-                
-                def execute_wrapper(*args, **kwargs):
-                    cur.execute(*args, **kwargs)
-                    return cur
-                
-                # Monkey patch fetches to return dicts
-                original_fetchone = cur.fetchone
-                original_fetchall = cur.fetchall
-                
-                def fetchone_wrapper():
-                    row = original_fetchone()
-                    if row is None: return None
-                    return dict_factory(cur, row)
-
-                def fetchall_wrapper():
-                    rows = original_fetchall()
-                    return [dict_factory(cur, row) for row in rows]
-                
-                cur.fetchone = fetchone_wrapper
-                cur.fetchall = fetchall_wrapper
-                return cur
-
-            # This is a bit hacky but `libsql` python binding is minimal.
-            # Better approach: Just use standard sqlite3 with remote URL if supported, 
-            # but libsql package is specific. 
-            # If the error is 'builtins.Connection' object has no attribute 'row_factory',
-            # it means we can't set it. 
-            
-            # ALTERNATIVE: The `libsql` package often returns a custom object.
-            # Let's try to see if we can just return the connection and handle row conversion 
-            # in a utility, OR, more robustly, duplicate the logic.
-            
-            # Actually, check if `conn.execute` returns a cursor that describes columns.
-            pass 
-            
-            # RE-TRYING SIMPLE APPROACH FIRST:
-            # If row_factory attribute fails, we can't use it.
-            # But we can try to wrap the connection to intercept cursor creation?
-            
-            class LibSQLConnectionWrapper:
-                def __init__(self, wrapped_conn):
-                    self.conn = wrapped_conn
-                    
-                def cursor(self):
-                    return LibSQLCursorWrapper(self.conn.cursor())
-                
-                def execute(self, sql, params=()):
-                    return self.cursor().execute(sql, params)
-
-                def commit(self):
-                    self.conn.commit()
-                    
-                def close(self):
-                    self.conn.close()
-
-            class LibSQLCursorWrapper:
-                def __init__(self, wrapped_cursor):
-                    self.cursor = wrapped_cursor
-                
-                def execute(self, sql, params=()):
-                    self.cursor.execute(sql, params)
-                    return self
-                    
-                def fetchone(self):
-                    row = self.cursor.fetchone()
-                    if row is None: return None
-                    return dict_factory(self.cursor, row)
-                
-                def fetchall(self):
-                    rows = self.cursor.fetchall()
-                    return [dict_factory(self.cursor, row) for row in rows]
-                
-                @property
-                def description(self):
-                    return self.cursor.description
-                
-                @property
-                def lastrowid(self):
-                    return self.cursor.lastrowid
-
-            return LibSQLConnectionWrapper(conn)
-
+            return LibSQLConnectionWrapper(conn, database_url=turso_url, auth_token=turso_token)
         except Exception as e:
             print(f"Warning: Failed to connect to Turso: {str(e)}")
             print("Falling back to local SQLite database.")
@@ -130,7 +331,638 @@ def get_db_connection():
     # Ensure directory exists
     if not DB_PATH.parent.exists():
         DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-        
-    conn = sqlite3.connect(DB_PATH)
+
+    # Pooled connections are handed to whichever thread serves the request,
+    # so the same-thread check has to be off. The pool guarantees one user at a time.
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    apply_pragmas(conn)
     return conn
+
+def _connect():
+    """
+    Opens a new raw connection for the pool: a ReplicaConnection in replica mode, the primary otherwise.
+    """
+    if REPLICA_PATH:
+        return ReplicaConnection()
+    return _connect_primary()
+
+
+# --- Replica mode ---
+# The public site is almost entirely reads. With DB_REPLICA_PATH set, SELECTs are served from a
+# local SQLite file and only writes travel to the primary (Turso, or db/glimprint.db when Turso
+# is not configured - handy for testing with two local files).
+
+_replica_lock = threading.Lock()
+_last_replica_sync = None
+_replica_stale = False  # local-file replica: a write was committed since the last copy
+_replica_syncer = None  # libsql embedded replica used to pull frames from Turso
+
+def _is_turso_configured():
+    return bool(os.environ.get("TURSO_DATABASE_URL") and os.environ.get("TURSO_AUTH_TOKEN"))
+
+def _replica_sync_due():
+    if _last_replica_sync is None or _replica_stale:
+        return True
+    return REPLICA_SYNC_INTERVAL > 0 and time.monotonic() - _last_replica_sync >= REPLICA_SYNC_INTERVAL
+
+def sync_replica(force=True):
+    """
+    Pulls the latest primary state into the local replica file.
+    With force=False it only syncs when the replica is older than DB_REPLICA_SYNC_INTERVAL,
+    has never been synced or is stale after a write (see replica_written), and skips if another
+    thread is already syncing an interval refresh. Returns True if a sync happened.
+    """
+    global _last_replica_sync, _replica_stale, _replica_syncer
+    if not REPLICA_PATH:
+        return False
+    if not force and not _replica_sync_due():
+        return False
+
+    # A slightly stale replica is fine for readers, so only wait for a running sync when we have to
+    if not _replica_lock.acquire(blocking=force or _last_replica_sync is None or _replica_stale):
+        return False
+    try:
+        # Another thread may have synced while we waited
+        if not force and not _replica_sync_due():
+            return False
+        if _is_turso_configured():
+            if _replica_syncer is None:
+                _replica_syncer = libsql.connect(
+                    REPLICA_PATH,
+                    sync_url=os.environ.get("TURSO_DATABASE_URL"),
+                    auth_token=os.environ.get("TURSO_AUTH_TOKEN"),
+                )
+            _replica_syncer.sync()
+        else:
+            # Writes committed while copying mark it stale again
+            _replica_stale = False
+            Path(REPLICA_PATH).parent.mkdir(parents=True, exist_ok=True)
+            src = sqlite3.connect(DB_PATH)
+            dst = sqlite3.connect(REPLICA_PATH)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+                src.close()
+        _last_replica_sync = time.monotonic()
+        return True
+    except Exception as e:
+        # Keep serving the (stale) replica rather than failing page views
+        print(f"Warning: Replica sync failed: {e}")
+        if not _is_turso_configured():
+            _replica_stale = True
+        return False
+    finally:
+        _replica_lock.release()
+
+def replica_written():
+    """
+    Call once a write to the primary is committed, so the next page view shows it.
+    A Turso replica pulls only the new frames, so it syncs right away. A local-file replica is a
+    full copy of db/glimprint.db, so it is only marked stale: the next read copies it, once for
+    however many writes (or group commits) came in between.
+    """
+    global _replica_stale
+    if not REPLICA_PATH:
+        return
+    if _is_turso_configured():
+        sync_replica(force=True)
+    else:
+        _replica_stale = True
+
+
+_READ_PREFIXES = ("SELECT", "WITH", "EXPLAIN", "VALUES")
+
+def _is_read_statement(sql):
+    stmt = sql.lstrip().lstrip("(").upper()
+    if stmt.startswith("PRAGMA"):
+        return "=" not in stmt  # "PRAGMA x = y" changes the database
+    return stmt.startswith(_READ_PREFIXES)
+
+
+class ReplicaConnection:
+    """
+    Connection used in replica mode. Reads go to the local replica file, writes go to the primary.
+    Once a transaction has written, its reads also go to the primary so it sees its own changes.
+    Committing a write re-syncs the replica (see replica_written), so the next page view shows the edit.
+    """
+    def __init__(self):
+        sync_replica(force=False)
+        if _is_turso_configured():
+            self.reader = LibSQLConnectionWrapper(libsql.connect(REPLICA_PATH))
+        else:
+            self.reader = sqlite3.connect(REPLICA_PATH, check_same_thread=False)
+            self.reader.row_factory = sqlite3.Row
+        self._writer = None  # opened on first write, so page views never touch the primary
+        self._dirty = False
+
+    @property
+    def writer(self):
+        if self._writer is None:
+            self._writer = _connect_primary()
+        return self._writer
+
+    def execute(self, sql, params=()):
+        if not self._dirty and _is_read_statement(sql):
+            return self.reader.execute(sql, params)
+        self._dirty = True
+        return self.writer.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        self._dirty = True
+        return self.writer.executemany(sql, seq_of_params)
+
+    def commit(self):
+        if self._writer is not None:
+            self._writer.commit()
+        if self._dirty:
+            self._dirty = False
+            replica_written()
+
+    def rollback(self):
+        if self._writer is not None:
+            self._writer.rollback()
+        if self.reader.in_transaction:
+            self.reader.rollback()
+        self._dirty = False
+
+    @property
+    def in_transaction(self):
+        return self._dirty or self.reader.in_transaction or (self._writer is not None and self._writer.in_transaction)
+
+    def close(self):
+        self.reader.close()
+        if self._writer is not None:
+            self._writer.close()
+
+
+class PooledConnection:
+    """
+    Proxy handed out by the pool. Behaves like the underlying connection,
+    except close() returns it to the pool instead of closing it.
+    """
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._raw)
+
+
+class ConnectionPool:
+    """
+    A small thread-safe connection pool.
+    - keeps at least `min_size` connections open (opened up front by fill()), never more than `max_size`
+    - connections idle longer than `health_check_after` are pinged before reuse
+    - connections idle longer than `idle_timeout` are closed (down to `min_size`)
+    """
+    def __init__(self, connect, min_size=1, max_size=10, idle_timeout=300, health_check_after=30, acquire_timeout=30):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self._idle = []  # list of (raw_conn, last_used); most recently used at the end
+        self._size = 0   # idle + checked out
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def acquire(self, timeout=None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                self._evict_idle()
+                if self._idle:
+                    raw, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    raw, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Timed out waiting for a database connection (max_size={self.max_size})")
+                self._cond.wait(remaining)
+
+        # Connect / health check outside the lock so a slow network doesn't block other threads
+        try:
+            if raw is None:
+                raw = self._connect()
+            elif time.monotonic() - last_used > self.health_check_after and not self._is_healthy(raw):
+                self._close_raw(raw)
+                raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw)
+
+    def fill(self):
+        """Opens connections until min_size are open, so the first requests skip the connect. Returns how many were opened."""
+        opened = 0
+        while True:
+            with self._cond:
+                if self._closed or self._size >= min(self.min_size, self.max_size):
+                    return opened
+                self._size += 1
+            try:
+                raw = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            self.release(raw)
+            opened += 1
+
+    def release(self, raw):
+        # Never hand a half-finished transaction to the next request
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception as e:
+            print(f"Warning: Dropping broken pooled connection: {e}")
+            self._discard(raw)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                self._close_raw(raw)
+                return
+            self._idle.append((raw, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            for raw, _ in self._idle:
+                self._close_raw(raw)
+            self._size -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle), "in_use": self._size - len(self._idle)}
+
+    def _discard(self, raw):
+        self._close_raw(raw)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _evict_idle(self):
+        # Oldest connections sit at the front of the list. Caller holds the lock.
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            raw, _ = self._idle.pop(0)
+            self._size -= 1
+            self._close_raw(raw)
+
+    @staticmethod
+    def _is_healthy(raw):
+        try:
+            raw.execute("SELECT 1").fetchone()
+            return True
+        except Exception as e:
+            print(f"Warning: Pooled connection failed health check: {e}")
+            return False
+
+    @staticmethod
+    def _close_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect,
+                    min_size=POOL_MIN_SIZE,
+                    max_size=POOL_MAX_SIZE,
+                    idle_timeout=POOL_IDLE_TIMEOUT,
+                    health_check_after=POOL_HEALTH_CHECK_AFTER,
+                    acquire_timeout=POOL_ACQUIRE_TIMEOUT,
+                )
+    return _pool
+
+def warm_pool():
+    """Opens the pool's DB_POOL_MIN_SIZE connections at startup (Turso: TLS handshake + auth before the first request)."""
+    try:
+        get_pool().fill()
+    except Exception as e:
+        # Requests will connect on demand
+        print(f"Warning: Could not open pooled connections at startup: {e}")
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def get_db_connection():
+    """
+    Returns a pooled database connection (Turso if configured, local SQLite otherwise).
+    Calling close() on it returns it to the pool.
+    """
+    # In replica mode, refresh the local copy once it is older than the sync interval
+    sync_replica(force=False)
+    return get_pool().acquire()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="db")
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Runs a blocking database call on the bounded DB thread pool and awaits the result,
+    so a slow query never stalls the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+# --- Single writer ---
+# Every write to the local SQLite database is a function fn(conn) queued to one writer thread. The
+# thread takes whatever writes are waiting, runs them in one transaction (each in its own savepoint,
+# so a failing write only undoes itself) and commits once: one fsync and one lock acquisition for the
+# whole group instead of one per request. Other processes (more uvicorn workers) still contend for
+# the lock; a batch that gets SQLITE_BUSY is rolled back and re-run after an exponential backoff.
+
+def is_busy_error(e):
+    """True for "database is locked" / "database table is locked" errors, which are worth retrying."""
+    return isinstance(e, sqlite3.OperationalError) and ("locked" in str(e) or "busy" in str(e))
+
+
+class WriteQueue:
+    """
+    Serializes writes onto one connection and commits them in groups.
+    submit(fn) returns a Future resolving to fn's return value, or to the exception fn raised.
+    Write functions must not commit or roll back themselves, and may run more than once
+    (a batch is re-run from the start after SQLITE_BUSY).
+    """
+    def __init__(self, connect, batch_max=32, retries=5, backoff=0.01):
+        self._connect = connect
+        self.batch_max = max(batch_max, 1)
+        self.retries = retries
+        self.backoff = backoff
+        self._conn = None
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.counts = {"writes": 0, "batches": 0, "retries": 0, "failed": 0}
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write queue is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+            self._jobs.put((lambda conn: fn(conn, *args, **kwargs), future))
+        return future
+
+    def close(self, timeout=10):
+        """Lets the writes already queued finish, then stops the thread and closes its connection."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._jobs.put(None)
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self):
+        return {**self.counts, "queued": self._jobs.qsize()}
+
+    def _run(self):
+        stop = False
+        while not stop:
+            job = self._jobs.get()
+            if job is None:
+                break
+            batch = [job]
+            # Group commit: everything that queued up while the last batch was being written
+            while len(batch) < self.batch_max:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+            self._write(batch)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _write(self, batch):
+        # Requests that gave up (client disconnected) have cancelled their future
+        batch = [(fn, future) for fn, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        for attempt in range(self.retries + 1):
+            try:
+                results = self._commit(batch)
+            except Exception as e:
+                self._reset(keep=is_busy_error(e))
+                if is_busy_error(e) and attempt < self.retries:
+                    self.counts["retries"] += 1
+                    time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+                    continue
+                print(f"Warning: Write batch of {len(batch)} failed: {e}")
+                self.counts["failed"] += len(batch)
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+            for (_, future), (ok, value) in zip(batch, results):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+            return
+
+    def _commit(self, batch):
+        if self._conn is None:
+            self._conn = self._connect()
+        conn = self._conn
+        # IMMEDIATE takes the write lock up front, so a busy database fails here and not half way through
+        conn.execute("BEGIN IMMEDIATE")
+        results = []
+        for fn, _ in batch:
+            conn.execute("SAVEPOINT write_job")
+            try:
+                results.append((True, fn(conn)))
+            except Exception as e:
+                if is_busy_error(e):
+                    raise
+                conn.execute("ROLLBACK TO write_job")
+                results.append((False, e))
+            conn.execute("RELEASE write_job")
+        conn.commit()
+        self.counts["batches"] += 1
+        self.counts["writes"] += len(batch)
+        replica_written()
+        return results
+
+    def _reset(self, keep=True):
+        """Rolls back a failed batch. The connection is replaced when that fails or the error was not a busy database."""
+        if self._conn is None:
+            return
+        try:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            if keep:
+                return
+        except Exception as e:
+            print(f"Warning: Dropping writer connection: {e}")
+        ConnectionPool._close_raw(self._conn)
+        self._conn = None
+
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+def use_write_queue():
+    # Turso serializes writes on the server and has no local fsync to share, so writes stay on the request's connection
+    return WRITE_QUEUE_ENABLED and not _is_turso_configured()
+
+def get_write_queue():
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue(_connect_primary, batch_max=WRITE_BATCH_MAX, retries=WRITE_RETRIES, backoff=WRITE_BACKOFF)
+    return _write_queue
+
+def close_write_queue():
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is not None:
+            _write_queue.close()
+            _write_queue = None
+
+
+class AsyncConnection:
+    """
+    Async facade over a pooled connection. Every call is executed on the DB thread pool.
+    Rows are fully fetched in the worker thread so nothing touches the connection from the event loop.
+    The pooled connection is only taken on first use, so requests answered from a cache never wait on the pool.
+    """
+    def __init__(self, conn=None):
+        self.conn = conn
+
+    async def acquire(self):
+        """Returns the underlying connection, taking one from the pool if this is the first use."""
+        if self.conn is None:
+            # Waiting for a free connection happens off the DB pool: if it blocked DB workers,
+            # requests already holding connections could not run their queries and release them.
+            self.conn = await asyncio.to_thread(get_db_connection)
+        return self.conn
+
+    async def fetchall(self, sql, params=()):
+        conn = await self.acquire()
+        return await run_db(lambda: conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql, params=()):
+        conn = await self.acquire()
+        return await run_db(lambda: conn.execute(sql, params).fetchone())
+
+    async def execute(self, sql, params=()):
+        """Runs a statement without fetching. Returns the cursor (e.g. for lastrowid)."""
+        conn = await self.acquire()
+        return await run_db(conn.execute, sql, params)
+
+    async def commit(self):
+        if self.conn is not None:
+            await run_db(self.conn.commit)
+
+    async def rollback(self):
+        if self.conn is not None:
+            await run_db(self.conn.rollback)
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs fn(conn, *args, **kwargs) on the DB thread pool, for multi-statement work."""
+        conn = await self.acquire()
+        return await run_db(fn, conn, *args, **kwargs)
+
+    async def batch(self, statements, return_exceptions=False):
+        """Runs several read statements in one round trip on Turso (see run_batch). Returns one list of rows per statement."""
+        conn = await self.acquire()
+        return await run_db(run_batch, conn, statements, return_exceptions)
+
+    async def write(self, fn, *args, **kwargs):
+        """
+        Runs fn(conn, *args, **kwargs) as one committed transaction and returns its result; if fn raises,
+        its changes are rolled back and the exception is raised here. On local SQLite it is queued to the
+        single writer (group commit); on Turso it runs on this request's connection.
+        """
+        if use_write_queue():
+            return await asyncio.wrap_future(get_write_queue().submit(fn, *args, **kwargs))
+        conn = await self.acquire()
+
+        def transaction():
+            try:
+                result = fn(conn, *args, **kwargs)
+                conn.commit()
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+        return await run_db(transaction)
+
+    async def close(self):
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            await run_db(conn.close)
+
+
+async def get_db():
+    """
+    FastAPI dependency: one pooled connection per request (taken lazily), wrapped in an AsyncConnection.
+    The connection is returned to the pool when the request ends.
+    """
+    db = AsyncConnection()
+    try:
+        yield db
+    finally:
+        await db.close()
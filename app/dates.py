@@ -0,0 +1,121 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+import pytz
+
+# Content tables with a normalized, indexed sort_date column -> the column it is computed from
+SORT_DATE_SOURCES = {"news": "date", "seminars": "date", "workshops": "start_date"}
+
+def normalize_date(value):
+    """
+    ISO "YYYY-MM-DD" for a stored date string, or None when it cannot be parsed.
+    Accepts ISO dates/datetimes and the "March 3rd, 2023" form of scraped news.
+    """
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return datetime.fromisoformat(value).date().isoformat()
+    except ValueError:
+        pass
+    try:
+        clean_date = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', value)  # Remove ordinal suffixes
+        return datetime.strptime(clean_date, "%B %d, %Y").date().isoformat()
+    except ValueError:
+        return None
+
+# Seminar times are shown in this zone
+DISPLAY_TIMEZONE = "US/Eastern"
+
+# A seminar counts as over this long after it started
+SEMINAR_OVER_AFTER = timedelta(hours=24)
+
+# The formatting below is memoized on the stored values: a row is formatted once per content
+# version, not once per page view (an edit changes the inputs, so it gets a fresh entry).
+FORMAT_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=None)
+def get_timezone(name):
+    return pytz.timezone(name)
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def seminar_time(start_datetime_utc, date=None, time=None):
+    """
+    (display_date, over_at) for a seminar. over_at is the aware datetime after which the seminar is
+    over (None when the start time is unknown), so is_over is a plain comparison per view.
+    """
+    eastern = get_timezone(DISPLAY_TIMEZONE)
+    if start_datetime_utc:
+        try:
+            utc_dt = datetime.fromisoformat(start_datetime_utc)
+            if utc_dt.tzinfo is None:
+                utc_dt = pytz.UTC.localize(utc_dt)
+            dt_aware = utc_dt.astimezone(eastern)
+            return dt_aware.strftime("%B %d, %Y, %I:%M %p %Z"), dt_aware + SEMINAR_OVER_AFTER
+        except ValueError:
+            return "Date TBD", None
+    if date and time:
+        try:
+            # Naive fallback: display the time as entered, assume ET for the is_over check
+            dt = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
+            return dt.strftime("%B %d, %Y, %I:%M %p"), eastern.localize(dt) + SEMINAR_OVER_AFTER
+        except ValueError:
+            return f"{date} at {time}", None
+    if date:
+        return date, None
+    return "Date TBD", None
+
+def is_over(over_at, now=None):
+    if over_at is None:
+        return False
+    return (now or datetime.now(pytz.UTC)) > over_at
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def format_date_range(start_date, end_date=None):
+    """
+    Workshop dates: "July 28 - 30, 2025", "July 28 - August 10, 2025",
+    "December 29, 2024 - January 2, 2025", or a single day. start_date/end_date are ISO strings.
+    """
+    if not start_date:
+        return "Date TBD"
+    try:
+        dt1 = datetime.fromisoformat(start_date)
+        if not end_date:
+            return dt1.strftime("%B %-d, %Y")
+        dt2 = datetime.fromisoformat(end_date)
+    except ValueError:
+        return start_date
+    if dt1.year != dt2.year:
+        return f"{dt1.strftime('%B %-d, %Y')} - {dt2.strftime('%B %-d, %Y')}"
+    if dt1.month != dt2.month:
+        return f"{dt1.strftime('%B %-d')} - {dt2.strftime('%B %-d, %Y')}"
+    return f"{dt1.strftime('%B %-d')} - {dt2.strftime('%-d, %Y')}"
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def format_day(date):
+    """ISO YYYY-MM-DD as "Month DD, YYYY"; anything else is shown as stored."""
+    if not date:
+        return ""
+    try:
+        return datetime.strptime(date, "%Y-%m-%d").strftime("%B %d, %Y")
+    except ValueError:
+        return date
+
+def seminar_cutoff(now=None):
+    """
+    Seminars with start_datetime_utc >= this are upcoming (not over yet, see SEMINAR_OVER_AFTER).
+    Formatted like the stored values so the comparison runs on the (status, start) index.
+    """
+    return ((now or datetime.now(pytz.UTC)) - SEMINAR_OVER_AFTER).strftime("%Y-%m-%dT%H:%M:%S")
+
+def workshop_cutoff(now=None):
+    """Workshops with start_date >= this (today, ISO) are upcoming."""
+    return (now or datetime.now(get_timezone(DISPLAY_TIMEZONE))).date().isoformat()
+
+def workshop_over_at(start_date):
+    """When a workshop stops being upcoming: midnight (display timezone) after its start date. None if unparseable."""
+    try:
+        day = datetime.strptime(start_date, "%Y-%m-%d") + timedelta(days=1)
+    except (TypeError, ValueError):
+        return None
+    return get_timezone(DISPLAY_TIMEZONE).localize(day)
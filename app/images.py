@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageOps, features
+
+# Content tables that can carry an image (stored in the images table, referenced by image_id)
+IMAGE_TABLES = ['news', 'seminars', 'workshops', 'members']
+
+# Upper bound for image bytes kept in memory by the image cache
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+# Bounded-size renditions generated on upload: name -> longest side in pixels.
+# Changing a size means the stored variants must be regenerated (a new migration, like app/migrations/0004_image_variants.py).
+VARIANT_SIZES = {"thumb": 160, "card": 480, "detail": 1200}
+
+# Modern encodings stored next to each variant (as "<variant>.<format>"), best first.
+# Served instead of the JPEG/PNG variant when the browser's Accept header lists them.
+VARIANT_FORMATS = {"avif": "image/avif", "webp": "image/webp"}
+# What this Pillow build can produce (AVIF needs libavif); other servers may have stored more
+ENCODABLE_FORMATS = [fmt for fmt in VARIANT_FORMATS if features.check(fmt)]
+
+def image_hash(data):
+    """Content address of an image: the SHA-256 of its bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+def image_url(hash_value, variant=None):
+    """Public URL for a stored image (or one of its variants), or None when there is no image."""
+    if not hash_value:
+        return None
+    return f"/images/{hash_value}/{variant}" if variant else f"/images/{hash_value}"
+
+def variant_size(width, height, variant):
+    """
+    Pixel size of a variant of a width x height image, or None when the original is already
+    within the bound (no variant is stored then; the original is served in its place).
+    """
+    bound = VARIANT_SIZES[variant]
+    if not width or not height or max(width, height) <= bound:
+        return None
+    scale = bound / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def responsive_image(hash_value, width, height, variant="card"):
+    """
+    Attributes for an <img>: src (the requested variant), srcset over every stored variant plus
+    the original, and the width/height of the src so the browser can reserve space.
+    """
+    if not hash_value:
+        return None
+    src, size = image_url(hash_value), (width, height)
+    srcset = []
+    for name in VARIANT_SIZES:
+        dims = variant_size(width, height, name)
+        if dims:
+            srcset.append(f"{image_url(hash_value, name)} {dims[0]}w")
+            if name == variant:
+                src, size = image_url(hash_value, name), dims
+    # The original only joins the set when it is no bigger than the largest variant
+    if width and not variant_size(width, height, max(VARIANT_SIZES, key=VARIANT_SIZES.get)):
+        srcset.append(f"{image_url(hash_value)} {width}w")
+    return {"src": src, "srcset": ", ".join(srcset), "width": size[0], "height": size[1]}
+
+def accepted_formats(accept):
+    """
+    Modern formats an Accept header explicitly allows, in our order of preference.
+    Wildcards do not count: a client sending */* is not promising it can decode AVIF.
+    """
+    allowed = set()
+    for part in accept.lower().split(","):
+        media, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try: q = float(value)
+                except ValueError: pass
+        if q > 0 and media.startswith("image/"):
+            allowed.add(media[len("image/"):])
+    return [fmt for fmt in VARIANT_FORMATS if fmt in allowed]
+
+def encode_image(img, fmt):
+    """Re-encodes a decoded image as AVIF or WebP."""
+    out = io.BytesIO()
+    if fmt == "avif":
+        img.save(out, "AVIF", quality=60, speed=8)
+    elif fmt == "webp":
+        img.save(out, "WEBP", quality=80, method=4)
+    return out.getvalue()
+
+def make_variants(data):
+    """
+    Decodes an upload and renders its variants. Returns ((width, height), [(name, width, height, mime, bytes)]).
+    Each variant comes as JPEG/PNG plus one "<variant>.<format>" row per ENCODABLE_FORMATS entry.
+    Anything Pillow cannot read is stored as-is: ((None, None), []).
+    """
+    try:
+        img = Image.open(io.BytesIO(data))
+        img = ImageOps.exif_transpose(img)  # phone photos: bake the EXIF rotation in
+    except Exception as e:
+        print(f"Image decode error: {e}")
+        return (None, None), []
+
+    has_alpha = img.mode in ("RGBA", "LA", "P")
+    variants = []
+    for name in VARIANT_SIZES:
+        dims = variant_size(img.width, img.height, name)
+        if not dims:
+            continue
+        out = io.BytesIO()
+        resized = img.resize(dims, Image.LANCZOS)
+        if has_alpha:
+            resized.convert("RGBA").save(out, "PNG", optimize=True)
+            mime = "image/png"
+        else:
+            resized.convert("RGB").save(out, "JPEG", quality=82, optimize=True, progressive=True)
+            mime = "image/jpeg"
+        variants.append((name, dims[0], dims[1], mime, out.getvalue()))
+        for fmt in ENCODABLE_FORMATS:
+            try:
+                encoded = encode_image(resized.convert("RGBA" if has_alpha else "RGB"), fmt)
+            except Exception as e:
+                print(f"Image encode error ({fmt}): {e}")
+                continue
+            variants.append((f"{name}.{fmt}", dims[0], dims[1], VARIANT_FORMATS[fmt], encoded))
+    return (img.width, img.height), variants
+
+class ImageCache:
+    """
+    LRU of hot image bytes keyed by hash, bounded by total size.
+    Entries never go stale: a hash always names the same bytes.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # hash -> (mime, data)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key, mime, data):
+        if len(data) > self.max_bytes:
+            return  # would evict everything else
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return
+            self._items[key] = (mime, data)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, (_, old) = self._items.popitem(last=False)
+                self.size -= len(old)
+
+    def stats(self):
+        return {"items": len(self._items), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+image_cache = ImageCache(IMAGE_CACHE_MAX_BYTES)
+
+async def prepare_image(db, data, mime):
+    """
+    Hashes an upload and renders its variants, off the event loop, ready for store_image inside a write.
+    Uploads already stored (same hash) are not decoded again.
+    """
+    hash_value = image_hash(data)
+    upload = {"hash": hash_value, "mime": mime, "data": data, "width": None, "height": None, "variants": [], "rendered": False}
+    if not await db.fetchone("SELECT id FROM images WHERE hash = ?", (hash_value,)):
+        # Resizing is CPU-bound: keep it off the event loop (and off the DB workers)
+        (upload["width"], upload["height"]), upload["variants"] = await asyncio.to_thread(make_variants, data)
+        upload["rendered"] = True
+    return upload
+
+def store_image(conn, upload):
+    """
+    Stores a prepared upload with its variants and returns the image id (called inside a write).
+    Identical uploads are stored once: an existing image with the same hash is reused.
+    """
+    row = conn.execute("SELECT id FROM images WHERE hash = ?", (upload["hash"],)).fetchone()
+    if row:
+        return row['id']
+    if not upload["rendered"]:
+        # The image existed when the upload was prepared, but was released since: render it now (rare)
+        (upload["width"], upload["height"]), upload["variants"] = make_variants(upload["data"])
+        upload["rendered"] = True
+    cursor = conn.execute(
+        "INSERT INTO images (hash, mime, data, width, height) VALUES (?, ?, ?, ?, ?)",
+        (upload["hash"], upload["mime"], upload["data"], upload["width"], upload["height"])
+    )
+    image_id = cursor.lastrowid
+    if upload["variants"]:
+        conn.executemany(
+            "INSERT INTO image_variants (image_id, variant, mime, data, width, height) VALUES (?, ?, ?, ?, ?, ?)",
+            [(image_id, name, v_mime, v_data, v_width, v_height) for name, v_width, v_height, v_mime, v_data in upload["variants"]]
+        )
+    return image_id
+
+def release_image(conn, image_id):
+    """Deletes an image once no content row references it any more (images are shared after dedupe). Called inside a write."""
+    if not image_id:
+        return
+    refs = " UNION ALL ".join(f"SELECT 1 FROM {t} WHERE image_id = ?" for t in IMAGE_TABLES)
+    if conn.execute(f"SELECT 1 WHERE EXISTS ({refs})", (image_id,) * len(IMAGE_TABLES)).fetchone():
+        return
+    conn.execute("DELETE FROM image_variants WHERE image_id = ?", (image_id,))
+    conn.execute("DELETE FROM images WHERE id = ?", (image_id,))
@@ -9,11 +9,35 @@ env_path = Path(__file__).resolve().parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
 from starlette.middleware.sessions import SessionMiddleware
+from contextlib import asynccontextmanager
 import os
 
 from .routes import router
-
-app = FastAPI(title="Glimprint")
+from .database import close_pool, close_write_queue, shutdown_executor, run_db, warm_pool, _connect_primary
+from .migrations import check_schema
+
+def startup_schema_check():
+    conn = _connect_primary()
+    try:
+        check_schema(conn)
+    except Exception as e:
+        print(f"Warning: schema check failed: {e}")
+    finally:
+        conn.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One MAX(version) query when the schema is current (see app/migrations)
+    await run_db(startup_schema_check)
+    # Open the minimum pool connections now rather than on the first requests
+    await run_db(warm_pool)
+    yield
+    # Finish queued writes, then close pooled database connections and the DB worker threads on shutdown
+    close_write_queue()
+    close_pool()
+    shutdown_executor()
+
+app = FastAPI(title="Glimprint", lifespan=lifespan)
 
 # Get Root Dir (now the current directory)
 BASE_DIR = Path(__file__).resolve().parent
@@ -0,0 +1,143 @@
+"""Content, admin and mailing tables, with the column renames/additions older databases went through."""
+import json
+from . import add_columns, columns
+
+def up(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS news (
+            slug TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            date TEXT NOT NULL,
+            image_data BLOB,
+            image_mime TEXT,
+            body TEXT NOT NULL,
+            related_links TEXT,
+            approval_status TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # --- Seminars ---
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS seminars (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            speaker TEXT NOT NULL,
+            date TEXT NOT NULL,
+            abstract TEXT NOT NULL,
+            image_filename TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    existing_cols = columns(conn, "seminars")
+    # slug/time came from the legacy import scripts on older databases; the rest were added later
+    add_columns(conn, "seminars", [
+        ("slug", "TEXT"),
+        ("time", "TEXT"),
+        ("location", "TEXT"),
+        ("related_links", "TEXT"),
+        ("start_datetime_utc", "TEXT"),
+        ("affiliation", "TEXT"),
+        ("end_datetime_utc", "TEXT"),
+    ])
+
+    # Migrate 'link' to 'related_links' where related_links is still empty
+    if "link" in existing_cols:
+        rows = conn.execute("SELECT id, link FROM seminars WHERE link IS NOT NULL AND link != '' AND (related_links IS NULL OR related_links = '')").fetchall()
+        for row in rows:
+            links_json = json.dumps([{"title": "Registration / Link", "url": row["link"]}])
+            conn.execute("UPDATE seminars SET related_links = ? WHERE id = ?", (links_json, row["id"]))
+        if rows:
+            print(f"  - Migrated 'link' to 'related_links' for {len(rows)} seminars")
+
+    # --- Workshops ---
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS workshops (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            date TEXT NOT NULL,
+            image_filename TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Note: 'description' might have been 'details', 'link' might have been 'external_link'
+    w_cols = columns(conn, "workshops")
+    if "details" in w_cols and "description" not in w_cols:
+        conn.execute("ALTER TABLE workshops RENAME COLUMN details TO description")
+        print("  - Renamed 'details' to 'description'")
+    if "external_link" in w_cols and "link" not in w_cols:
+        conn.execute("ALTER TABLE workshops RENAME COLUMN external_link TO link")
+        print("  - Renamed 'external_link' to 'link'")
+    add_columns(conn, "workshops", [
+        ("slug", "TEXT"),
+        ("description", "TEXT"),
+        ("start_date", "TEXT"),
+        ("end_date", "TEXT"),
+        ("location", "TEXT"),
+        ("related_links", "TEXT"),
+    ])
+
+    # Migrate link -> related_links
+    if "link" in columns(conn, "workshops"):
+        rows = conn.execute("SELECT id, link FROM workshops WHERE link IS NOT NULL AND link != '' AND (related_links IS NULL OR related_links = '')").fetchall()
+        for row in rows:
+            links_json = json.dumps([{"title": "Website", "url": row["link"]}])
+            conn.execute("UPDATE workshops SET related_links = ? WHERE id = ?", (links_json, row["id"]))
+        if rows:
+            print(f"  - Migrated 'link' to 'related_links' for {len(rows)} workshops")
+
+    # --- Publications ---
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS publications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            authors TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    p_cols = columns(conn, "publications")
+    if "journal" in p_cols and "description" not in p_cols:
+        conn.execute("ALTER TABLE publications RENAME COLUMN journal TO description")
+        print("  - Renamed 'journal' to 'description'")
+    add_columns(conn, "publications", [("slug", "TEXT"), ("description", "TEXT"), ("link", "TEXT")])
+
+    # --- Members ---
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS members (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            slug TEXT,
+            name TEXT NOT NULL,
+            affiliation TEXT,
+            email TEXT,
+            education TEXT,
+            statement TEXT,
+            links TEXT,
+            image_data BLOB,
+            image_mime TEXT,
+            sort_order INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # --- Admins ---
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS admins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            email TEXT
+        )
+    ''')
+
+    # --- Contacts (Mailing) ---
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS contacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL UNIQUE,
+            name TEXT,
+            affiliation TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    add_columns(conn, "contacts", [("affiliation", "TEXT")])
@@ -0,0 +1,26 @@
+"""
+Indexed 'status' column next to the approval_status JSON blob ({"status": ..., "by": ..., "at": ...}),
+so listings filter on status in SQL.
+"""
+import json
+from . import add_columns, backfill, table_exists
+
+CONTENT_TABLES = ["news", "seminars", "workshops", "publications", "members"]
+
+def status_of(row):
+    try:
+        status = json.loads(row["approval_status"]).get("status")
+    except Exception:
+        status = None
+    return (status,) if status else None
+
+def up(conn):
+    for t in CONTENT_TABLES:
+        if not table_exists(conn, t):
+            print(f"  - Table '{t}' does not exist, skipping")
+            continue
+        add_columns(conn, t, [("approval_status", "TEXT"), ("status", "TEXT")])
+        filled = backfill(conn, t, "approval_status", "status IS NULL AND approval_status IS NOT NULL", ["status"], status_of)
+        if filled:
+            print(f"  - Backfilled status for {filled} rows in {t}")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{t}_status ON {t}(status)")
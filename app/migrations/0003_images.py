@@ -0,0 +1,61 @@
+"""
+Image bytes move to their own content-addressed table (served from /images/<sha256>), so listing
+queries never drag BLOBs along; content rows point at their image through image_id and identical
+uploads are stored once.
+"""
+import hashlib
+from . import IMAGE_CHUNK, add_columns, chunks, columns, table_exists
+
+IMAGE_TABLES = ["news", "seminars", "workshops", "members"]
+
+# Moving the blobs out leaves their pages free; update_schema.py vacuums after this migration
+VACUUM = True
+
+def up(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS images (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hash TEXT,
+            mime TEXT,
+            data BLOB NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    tables = [t for t in IMAGE_TABLES if table_exists(conn, t)]
+    for t in tables:
+        add_columns(conn, t, [("image_id", "INTEGER")])
+        if "image_data" not in columns(conn, t):
+            continue
+        moved = 0
+        for rows in chunks(conn, t, "image_data, image_mime", "image_data IS NOT NULL AND image_id IS NULL", IMAGE_CHUNK):
+            for row in rows:
+                cursor = conn.execute("INSERT INTO images (hash, mime, data) VALUES (?, ?, ?)", (hashlib.sha256(row["image_data"]).hexdigest(), row["image_mime"], row["image_data"]))
+                conn.execute(f"UPDATE {t} SET image_id = ?, image_data = NULL, image_mime = NULL WHERE rowid = ?", (cursor.lastrowid, row["rid"]))
+            moved += len(rows)
+        if moved:
+            print(f"  - Moved {moved} images out of {t}")
+
+    # Hashes for images stored before the table was content-addressed
+    add_columns(conn, "images", [("hash", "TEXT")])
+    hashed = 0
+    for rows in chunks(conn, "images", "data", "hash IS NULL", IMAGE_CHUNK):
+        conn.executemany("UPDATE images SET hash = ? WHERE rowid = ?", [(hashlib.sha256(row["data"]).hexdigest(), row["rid"]) for row in rows])
+        hashed += len(rows)
+    if hashed:
+        print(f"  - Hashed {hashed} images")
+
+    # Collapse duplicates onto the oldest copy before the unique index goes on
+    dupes = conn.execute("SELECT hash, MIN(id) AS keep FROM images GROUP BY hash HAVING COUNT(*) > 1").fetchall()
+    for dupe in dupes:
+        for t in tables:
+            conn.execute(f"UPDATE {t} SET image_id = ? WHERE image_id IN (SELECT id FROM images WHERE hash = ?)", (dupe["keep"], dupe["hash"]))
+        conn.execute("DELETE FROM images WHERE hash = ? AND id != ?", (dupe["hash"], dupe["keep"]))
+    if dupes:
+        print(f"  - Merged duplicates of {len(dupes)} images")
+
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_images_hash ON images(hash)")
+    # Reference checks when an image is released (see app/images.py)
+    for t in tables:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{t}_image_id ON {t}(image_id)")
@@ -0,0 +1,53 @@
+"""
+Resized renditions of each image (thumb/card/detail, see VARIANT_SIZES in app/images.py) and their
+AVIF/WebP encodings, plus the original's dimensions, so pages can emit srcset/width/height without
+touching the bytes. Only the formats this Pillow build can write are generated (ENCODABLE_FORMATS).
+"""
+from app.images import ENCODABLE_FORMATS, make_variants
+from . import IMAGE_CHUNK, add_columns, chunks
+
+def insert_variants(conn, image_id, variants):
+    conn.executemany(
+        "INSERT OR IGNORE INTO image_variants (image_id, variant, mime, data, width, height) VALUES (?, ?, ?, ?, ?, ?)",
+        [(image_id, name, v_mime, v_data, v_width, v_height) for name, v_width, v_height, v_mime, v_data in variants]
+    )
+
+def up(conn):
+    add_columns(conn, "images", [("width", "INTEGER"), ("height", "INTEGER")])
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS image_variants (
+            image_id INTEGER NOT NULL,
+            variant TEXT NOT NULL,
+            mime TEXT,
+            data BLOB NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            PRIMARY KEY (image_id, variant)
+        )
+    ''')
+    made = 0
+    for rows in chunks(conn, "images", "data", "width IS NULL", IMAGE_CHUNK):
+        for row in rows:
+            (width, height), variants = make_variants(row["data"])
+            if width is None:
+                continue  # not decodable, served as-is
+            conn.execute("UPDATE images SET width = ?, height = ? WHERE rowid = ?", (width, height, row["rid"]))
+            conn.execute("DELETE FROM image_variants WHERE image_id = ?", (row["rid"],))
+            insert_variants(conn, row["rid"], variants)
+            made += 1
+    if made:
+        print(f"  - Generated variants for {made} images")
+
+    # Images that have resized variants but not yet the encoded copies ("card.webp", ...)
+    if not ENCODABLE_FORMATS:
+        return
+    encoded = 0
+    where = ("width IS NOT NULL AND id IN (SELECT image_id FROM image_variants) "
+             f"AND id NOT IN (SELECT image_id FROM image_variants WHERE variant LIKE '%.{ENCODABLE_FORMATS[-1]}')")
+    for rows in chunks(conn, "images", "data", where, IMAGE_CHUNK):
+        for row in rows:
+            _, variants = make_variants(row["data"])
+            insert_variants(conn, row["rid"], variants)
+        encoded += len(rows)
+    if encoded:
+        print(f"  - Encoded variants for {encoded} images ({', '.join(ENCODABLE_FORMATS)})")
@@ -0,0 +1,27 @@
+"""
+sort_date: the ISO (YYYY-MM-DD) form of each row's date, computed on write (app/dates.py), so listings
+order in SQL instead of parsing "March 3rd, 2023"-style dates on every request.
+"""
+from app.dates import SORT_DATE_SOURCES, normalize_date
+from . import add_columns, backfill
+
+def up(conn):
+    for t, source in SORT_DATE_SOURCES.items():
+        add_columns(conn, t, [("sort_date", "TEXT")])
+        pk = "slug" if t == "news" else "id"
+        unparsed = []
+
+        def compute(row):
+            sort_date = normalize_date(row["value"])
+            if sort_date:
+                return (sort_date,)
+            if row["value"]:
+                unparsed.append(row)  # no date at all (e.g. a workshop "Date TBD") is not an error
+            return None
+
+        filled = backfill(conn, t, f"{pk} AS pk, {source} AS value", "sort_date IS NULL", ["sort_date"], compute)
+        if filled:
+            print(f"  - Backfilled sort_date for {filled} rows in {t}")
+        # Left NULL (listed last); fix the date in the admin and saving the item fills sort_date
+        for row in unparsed:
+            print(f"  ! {t} {pk}={row['pk']}: cannot parse {source} {row['value']!r}")
@@ -0,0 +1,13 @@
+"""
+plain_text / summary extracted from the HTML body on write (app/text.py), so listings read a short
+summary instead of stripping tags from every full body on every request.
+"""
+from app.text import TEXT_SOURCES, summarize
+from . import add_columns, backfill
+
+def up(conn):
+    for t, source in TEXT_SOURCES.items():
+        add_columns(conn, t, [("plain_text", "TEXT"), ("summary", "TEXT")])
+        filled = backfill(conn, t, f"{source} AS html", "summary IS NULL", ["plain_text", "summary"], lambda row: summarize(row["html"]))
+        if filled:
+            print(f"  - Extracted text for {filled} rows in {t}")
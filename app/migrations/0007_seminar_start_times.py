@@ -0,0 +1,25 @@
+"""
+Upcoming/past seminar views are range queries on start_datetime_utc. Older rows only have date + time;
+they were always treated as US Eastern (is_over), so store that as UTC.
+"""
+from datetime import datetime
+import pytz
+from app.dates import DISPLAY_TIMEZONE
+from . import backfill
+
+def up(conn):
+    eastern = pytz.timezone(DISPLAY_TIMEZONE)
+
+    def compute(row):
+        try:
+            local_dt = eastern.localize(datetime.strptime(f"{row['date']} {row['time']}", "%Y-%m-%d %H:%M"))
+        except ValueError:
+            print(f"  ! seminars id={row['id']}: cannot parse date/time {row['date']!r} {row['time']!r}")
+            return None
+        return (local_dt.astimezone(pytz.UTC).isoformat(),)
+
+    filled = backfill(conn, "seminars", "id, date, time",
+                      "start_datetime_utc IS NULL AND date IS NOT NULL AND time IS NOT NULL AND time != ''",
+                      ["start_datetime_utc"], compute)
+    if filled:
+        print(f"  - Backfilled start_datetime_utc for {filled} seminars")
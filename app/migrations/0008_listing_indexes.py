@@ -0,0 +1,22 @@
+"""
+The public listings page with keyset cursors (app/pagination.py) and the home page takes the newest
+few per type. Each index matches the query's filter + sort keys exactly, so any page is one index
+range scan.
+"""
+
+LISTING_INDEXES = {
+    "idx_news_sort_date": "news(COALESCE(sort_date, ''), slug)",
+    "idx_news_status_sort_date": "news(status, COALESCE(sort_date, ''), slug)",
+    "idx_seminars_status_sort_date": "seminars(status, COALESCE(sort_date, ''), id)",
+    "idx_workshops_status_sort_date": "workshops(status, COALESCE(sort_date, ''), id)",
+    # Upcoming (>= cutoff, ascending) and past (< cutoff, descending) activity views
+    "idx_seminars_status_start_utc": "seminars(status, COALESCE(start_datetime_utc, ''), id)",
+    "idx_workshops_status_start_date": "workshops(status, COALESCE(start_date, ''), id)",
+    "idx_publications_status_created": "publications(status, COALESCE(created_at, ''), id)",
+}
+
+def up(conn):
+    for name in ["idx_news_date_slug", "idx_seminars_status_date", "idx_workshops_status_start"]:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")  # superseded by the sort_date indexes
+    for name, definition in LISTING_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
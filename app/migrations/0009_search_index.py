@@ -0,0 +1,28 @@
+"""
+One FTS5 table over all approved content (app/search.py), kept in sync by triggers on the content
+tables, so every write path (app, admin, scripts) updates it without extra code. A later change to
+SEARCH_SOURCES needs a new migration that re-creates the triggers and refills the index.
+"""
+from app.search import SEARCH_TABLE, SEARCH_CREATE_SQL, SEARCH_KEYS_CREATE_SQL, SEARCH_SOURCES, search_triggers, search_fill_sql
+from . import table_exists
+
+def up(conn):
+    created = not table_exists(conn, SEARCH_TABLE)
+    try:
+        conn.execute(SEARCH_CREATE_SQL)
+    except Exception as e:
+        print(f"  ! FTS5 not available, search disabled: {e}")
+        return
+    conn.execute(SEARCH_KEYS_CREATE_SQL)
+    for kind, (table, *_) in SEARCH_SOURCES.items():
+        if not table_exists(conn, table):
+            continue
+        for name, create_sql in search_triggers(kind):
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(create_sql)
+        if created:
+            for sql in search_fill_sql(kind):
+                conn.execute(sql)
+    if created:
+        count = conn.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}").fetchone()[0]
+        print(f"  - Created {SEARCH_TABLE} with {count} entries")
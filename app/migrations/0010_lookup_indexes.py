@@ -0,0 +1,19 @@
+"""
+Detail pages, image redirects and approvals find rows by slug; admin lists order by created_at;
+the members page by sort_order. scripts/check_query_plans.py fails if a route query scans a table.
+"""
+
+LOOKUP_INDEXES = {
+    "idx_seminars_slug": "seminars(slug)",
+    "idx_workshops_slug": "workshops(slug)",
+    "idx_publications_slug": "publications(slug)",
+    "idx_members_slug": "members(slug)",
+    "idx_members_status_sort_order": "members(status, sort_order)",
+    "idx_contacts_name": "contacts(name)",
+}
+for t in ["news", "seminars", "workshops", "publications", "members"]:
+    LOOKUP_INDEXES[f"idx_{t}_created"] = f"{t}(created_at)"
+
+def up(conn):
+    for name, definition in LOOKUP_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
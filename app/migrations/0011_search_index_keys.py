@@ -0,0 +1,27 @@
+"""
+Keys the search index by rowid: search_index_keys maps (kind, key) to the entry's rowid, so the sync
+triggers delete an entry by rowid instead of scanning the whole index for its UNINDEXED kind/key.
+Databases indexed by 0009 before the keys table existed get the new triggers and a refilled index.
+"""
+from app.search import SEARCH_TABLE, SEARCH_KEYS_TABLE, SEARCH_KEYS_CREATE_SQL, SEARCH_SOURCES, search_triggers, search_fill_sql
+from . import table_exists
+
+def up(conn):
+    if not table_exists(conn, SEARCH_TABLE):
+        return  # FTS5 not available, search disabled (0009)
+    refill = not table_exists(conn, SEARCH_KEYS_TABLE)
+    conn.execute(SEARCH_KEYS_CREATE_SQL)
+    if refill:
+        conn.execute(f"DELETE FROM {SEARCH_TABLE}")
+    for kind, (table, *_) in SEARCH_SOURCES.items():
+        if not table_exists(conn, table):
+            continue
+        for name, create_sql in search_triggers(kind):
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(create_sql)
+        if refill:
+            for sql in search_fill_sql(kind):
+                conn.execute(sql)
+    if refill:
+        count = conn.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}").fetchone()[0]
+        print(f"  - Re-indexed {SEARCH_TABLE} by rowid: {count} entries")
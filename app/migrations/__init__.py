@@ -0,0 +1,151 @@
+"""
+Versioned schema migrations.
+
+Each migration is a module in this package named <version>_<name>.py (e.g. 0005_sort_date.py) with an
+up(conn) function. conn is a plain DB-API connection to the primary database: sqlite3 locally, the
+libsql wrapper on Turso, so migrations only use execute/executemany/commit and row['col'] access.
+Applied versions are recorded in the schema_migrations table; migrate() runs the missing ones in order.
+
+Migrations are written to be idempotent (IF NOT EXISTS, column checks, backfills that only touch rows
+still missing the value), so a database that was brought up to date by the old update_schema.py gets
+its versions recorded without changing anything, and a migration interrupted half way can be re-run.
+Backfills go through backfill()/chunks(), which work through a table a chunk of rows at a time and
+commit after each chunk, instead of one statement (and one transaction) over the whole table.
+"""
+import importlib
+import os
+import pkgutil
+import re
+from datetime import datetime, timezone
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+# Rows per backfill chunk (one SELECT + one executemany + one commit each)
+BACKFILL_CHUNK = int(os.environ.get("MIGRATION_CHUNK_SIZE", 500))
+# Rows per chunk for backfills that read image bytes (kept small: each row carries a whole image)
+IMAGE_CHUNK = 20
+
+# Startup check (app lifespan): with MIGRATE_ON_STARTUP=1 pending migrations are applied,
+# otherwise the app only warns that scripts/update_schema.py needs to run
+MIGRATE_ON_STARTUP = os.environ.get("MIGRATE_ON_STARTUP", "0") == "1"
+
+MODULE_NAME = re.compile(r"^(\d{4})_(\w+)$")
+
+def discover():
+    """(version, module name) of every migration in this package, in order. Modules are not imported."""
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        match = MODULE_NAME.match(info.name)
+        if match:
+            found.append((int(match.group(1)), info.name))
+    return sorted(found)
+
+def latest_version():
+    migrations = discover()
+    return migrations[-1][0] if migrations else 0
+
+def current_version(conn):
+    """Highest applied version; 0 when nothing is recorded yet (or the table does not exist)."""
+    try:
+        row = conn.execute(f"SELECT MAX(version) FROM {MIGRATIONS_TABLE}").fetchone()
+    except Exception:
+        return 0
+    return (row[0] if row else None) or 0
+
+def migrate(conn, log=print):
+    """Applies every migration not recorded in schema_migrations, in order. Returns the applied modules."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+    done = {row[0] for row in conn.execute(f"SELECT version FROM {MIGRATIONS_TABLE}").fetchall()}
+    applied = []
+    for version, name in discover():
+        if version in done:
+            continue
+        log(f"Applying migration {name}...")
+        module = importlib.import_module(f"{__name__}.{name}")
+        try:
+            module.up(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        conn.execute(
+            f"INSERT OR IGNORE INTO {MIGRATIONS_TABLE} (version, name, applied_at) VALUES (?, ?, ?)",
+            (version, name, datetime.now(timezone.utc).isoformat())
+        )
+        conn.commit()
+        applied.append(module)
+    return applied
+
+def check_schema(conn, auto_migrate=MIGRATE_ON_STARTUP):
+    """
+    Startup check: one indexed MAX() query when the schema is up to date, nothing else.
+    When it is behind, applies the pending migrations (auto_migrate) or prints a warning.
+    """
+    current, latest = current_version(conn), latest_version()
+    if current >= latest:
+        return
+    if not auto_migrate:
+        print(f"Warning: database schema is at version {current}, the code expects {latest}. Run scripts/update_schema.py")
+        return
+    migrate(conn)
+
+
+# --- Helpers for migration modules ---
+
+def table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (table,)).fetchone() is not None
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+def add_columns(conn, table, new_columns):
+    """Adds each (name, type) of new_columns that table does not have yet."""
+    existing = columns(conn, table)
+    for name, col_type in new_columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+            print(f"  - Added column: {table}.{name}")
+
+def chunks(conn, table, select, where, size=None):
+    """
+    Yields the rows of table matching where as lists of at most size rows, in rowid order, each row
+    with its rowid as 'rid'. Commits after each chunk, once the caller has handled it. Walks forward
+    from the last rowid seen, so rows the caller leaves unchanged are not read again.
+    """
+    size = size or BACKFILL_CHUNK
+    last = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT rowid AS rid, {select} FROM {table} WHERE rowid > ? AND ({where}) ORDER BY rowid LIMIT ?",
+            (last, size)
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        conn.commit()
+        last = rows[-1]["rid"]
+
+def backfill(conn, table, select, where, set_columns, compute, size=None):
+    """
+    Sets set_columns to compute(row) on every row of table matching where, one executemany per chunk.
+    compute returns a tuple of values, or None to leave the row as it is. Returns the number of rows updated.
+    """
+    assignments = ", ".join(f"{col} = ?" for col in set_columns)
+    updated = 0
+    for rows in chunks(conn, table, select, where, size):
+        params = []
+        for row in rows:
+            values = compute(row)
+            if values is not None:
+                params.append((*values, row["rid"]))
+        if params:
+            conn.executemany(f"UPDATE {table} SET {assignments} WHERE rowid = ?", params)
+            updated += len(params)
+    return updated
@@ -0,0 +1,99 @@
+import heapq
+import re
+import unicodedata
+from collections import Counter
+from .cache import name_cache
+
+# People lookup for autocomplete: an in-memory trigram index over member names, seminar speakers and
+# (for admins) mailing contacts. Matching on shared trigrams of the normalized name tolerates accents,
+# typos and partial input, which exact or LIKE '%x%' lookups do not. The index is built on first use
+# and rebuilt after invalidate_content() on one of NAME_TABLES (see app/cache.py).
+
+# kind -> query returning (name, detail, url) rows; contacts are only offered to admins
+NAME_SOURCES = {
+    "Member": ("SELECT name, affiliation, '/members/' || slug FROM members WHERE status = 'approved' ORDER BY sort_order", True),
+    "Speaker": ("SELECT speaker, affiliation, '/activities/seminars/' || slug FROM seminars WHERE status = 'approved' "
+                "ORDER BY COALESCE(sort_date, '') DESC, id DESC", True),
+    "Contact": ("SELECT COALESCE(NULLIF(name, ''), email), email, NULL FROM contacts ORDER BY name", False),
+}
+
+AUTOCOMPLETE_LIMIT = 8
+MAX_AUTOCOMPLETE_LIMIT = 20
+MAX_QUERY_LENGTH = 64  # longer input is cut, keeps the per-request work bounded
+
+# A name is offered when at least this share of the query's trigrams occur in it
+MIN_SCORE = 0.4
+
+def normalize_name(name):
+    """Lowercase, accents stripped, punctuation turned into spaces: "José  O'Neil" -> "jose o neil"."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    plain = "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return " ".join(re.findall(r"\w+", plain))
+
+def trigrams(text, partial=False):
+    """
+    Set of trigrams of a normalized name, each word padded like pg_trgm ("  jo", " jos", ..., "se ").
+    With partial=True the last word is treated as still being typed and gets no end padding,
+    so "jos" matches "jose" as well as "joseph".
+    """
+    grams = set()
+    words = text.split()
+    for i, word in enumerate(words):
+        padded = "  " + word + ("" if partial and i == len(words) - 1 else " ")
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+class NameIndex:
+    """Trigram -> entry postings over (kind, name, detail, url, public) entries."""
+    def __init__(self, entries):
+        self.entries = entries
+        self.sizes = []
+        self.postings = {}
+        for i, entry in enumerate(entries):
+            grams = trigrams(normalize_name(entry[1]))
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+
+    def lookup(self, q, limit=AUTOCOMPLETE_LIMIT, public_only=True):
+        """
+        Best matches for q, as dicts (kind, name, detail, url). Ranked by the share of the query's
+        trigrams found in the name, then by how little else the name contains (closer length wins).
+        """
+        grams = trigrams(normalize_name(q[:MAX_QUERY_LENGTH]), partial=True)
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        candidates = (
+            (count / len(grams), -self.sizes[i], -i, i) for i, count in shared.items()
+            if count / len(grams) >= MIN_SCORE and (self.entries[i][4] or not public_only)
+        )
+        best = heapq.nlargest(limit, candidates)
+        return [dict(zip(("kind", "name", "detail", "url"), self.entries[i][:4])) for *_, i in best]
+
+async def build_name_index(db):
+    entries = []
+    results = await db.batch([sql for sql, _ in NAME_SOURCES.values()], return_exceptions=True)
+    for (kind, (sql, public)), rows in zip(NAME_SOURCES.items(), results):
+        if isinstance(rows, Exception):
+            print(f"Warning: could not index {kind} names: {rows}")
+            continue
+        seen = set()
+        for name, detail, url in rows:
+            key = normalize_name(name)
+            # A speaker with several seminars is listed once, linking the most recent one
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            entries.append((kind, name.strip(), detail or "", url, public))
+    return NameIndex(entries)
+
+async def get_name_index(db):
+    index = name_cache.get("names")
+    if index is None:
+        generation = name_cache.generation
+        index = await build_name_index(db)
+        name_cache.set("names", index, generation)
+    return index
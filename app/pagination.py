@@ -0,0 +1,66 @@
+import base64
+import json
+import os
+from urllib.parse import urlencode
+from fastapi import HTTPException
+
+# Rows per listing page (?limit= may ask for fewer or more, up to MAX_PAGE_SIZE)
+PAGE_SIZE = int(os.environ.get("PAGE_SIZE", 20))
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(values):
+    """Opaque ?after= token for the sort key values of the last row on a page."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid page cursor")
+    return values
+
+def page_limit(limit):
+    if not limit:
+        return PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+async def keyset_page(db, columns, source, keys, where=None, params=(), descending=True, after=None, limit=None):
+    """
+    One page of a listing using keyset (cursor) pagination.
+    keys is the ORDER BY pair (sort key, unique tie-breaker), e.g. ["date", "id"]. Rows after the cursor
+    are selected with "key <= ? AND (key < ? OR (key = ? AND id < ?))": unlike a row-value comparison, SQLite turns
+    the first term into an index range even on an expression index, so an index on (filter columns, keys)
+    serves every page at the cost of page one instead of skipping OFFSET rows.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    limit = page_limit(limit)
+    conditions = [where] if where else []
+    args = list(params)
+    if after:
+        sort_key, unique_key = keys
+        value, last = decode_cursor(after, 2)
+        lt, le = ("<", "<=") if descending else (">", ">=")
+        conditions.append(f"{sort_key} {le} ? AND ({sort_key} {lt} ? OR ({sort_key} = ? AND {unique_key} {lt} ?))")
+        args += [value, value, value, last]
+    direction = "DESC" if descending else "ASC"
+    sql = (
+        f"SELECT {columns}, {', '.join(f'{k} AS _key{i}' for i, k in enumerate(keys))} FROM {source}"
+        + (f" WHERE {' AND '.join(conditions)}" if conditions else "")
+        + f" ORDER BY {', '.join(f'{k} {direction}' for k in keys)} LIMIT ?"
+    )
+    # One extra row tells whether there is a next page
+    rows = await db.fetchall(sql, args + [limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][f"_key{i}"] for i in range(len(keys))])
+
+def next_page_url(request, cursor):
+    """URL of the page after cursor, keeping the other query parameters (e.g. limit)."""
+    if not cursor:
+        return None
+    query = {k: v for k, v in request.query_params.items() if k != "after"}
+    query["after"] = cursor
+    return f"{request.url.path}?{urlencode(query)}"
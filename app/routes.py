@@ -1,16 +1,24 @@
 from fastapi import APIRouter, Request, HTTPException, Response, Depends, File, UploadFile, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
+from urllib.parse import urlencode
 import markdown
 import json
 import frontmatter
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
 import sqlite3
 import json
-from .database import get_db_connection
+from .database import get_db
+from .cache import cached_page, expire_page_at, feed_cache, name_cache, page_cache, invalidate_content
+from .pagination import PAGE_SIZE, keyset_page, next_page_url
+from .search import search
+from .names import AUTOCOMPLETE_LIMIT, MAX_AUTOCOMPLETE_LIMIT, get_name_index
+from .dates import normalize_date, get_timezone, seminar_time, is_over, format_date_range, format_day, seminar_cutoff, workshop_cutoff, workshop_over_at
+from .text import summarize, truncate
+from .images import IMAGE_TABLES, VARIANT_SIZES, accepted_formats, image_cache, image_url, responsive_image, prepare_image, store_image, release_image
 from .auth import verify_password, get_password_hash, get_current_admin, require_admin
 
 router = APIRouter()
@@ -26,140 +34,64 @@ def from_json(value):
         return {}
 
 templates.env.filters["from_json"] = from_json
-# get_db_connection is imported from .database
-
-def get_aggregated_news(limit=None):
-    conn = get_db_connection()
-    items = []
-    
-    # News
-    try:
-        # Fetch all, filter in python for json 'status': 'approved'
-        news_rows = conn.execute("SELECT * FROM news").fetchall()
-        for r in news_rows:
-            d = dict(r)
-            # Check approval
-            status = d.get("approval_status")
-            is_approved = False
-            if status:
-                try:
-                    s_json = json.loads(status)
-                    if s_json.get("status") == "approved":
-                        is_approved = True
-                except: pass
-            else:
-                # Fallback for old data if any (though we updated schema)
-                # If None, assume approved? No, strictly require approval now.
-                # But migration script set it.
-                pass
-            
-            if not is_approved: continue
-
-            # Create a summary from body if safe
-            summary = ""
-            if d.get("body"):
-                # Strip HTML for summary (naive)
-                clean_text = re.sub('<[^<]+?>', '', d["body"])
-                summary = clean_text[:150] + "..." if len(clean_text) > 150 else clean_text
-            
-            items.append({
-                "type": "News",
-                "title": d["title"],
-                "date": d["date"] or "", # ISO or empty
-                "image_url": f"/news/image/{d['slug']}" if d["image_data"] else None,
-                "url": f"/news/{d['slug']}",
-                "summary": summary
-            })
-    except Exception as e: print(f"News error: {e}")
-
-    # Seminars
-    try:
-        sem_rows = conn.execute("SELECT * FROM seminars").fetchall()
-        for r in sem_rows:
-            d = dict(r)
-            status = d.get("approval_status")
-            is_approved = False
-            if status:
-                try:
-                    s_json = json.loads(status)
-                    if s_json.get("status") == "approved": is_approved = True
-                except: pass
-            if not is_approved: continue
-
-            items.append({
-                "type": "Seminar",
-                "title": d["title"],
-                "date": d["date"] or "",
-                "announcement_date": d.get("announcement_date"),
-                "image_url": f"/seminars/image/{d['slug']}" if d["image_data"] else None, # Use seminar image
-                "url": f"/activities/seminars/{d['slug']}",
-                "summary": f"Speaker: {d.get('speaker', 'Unknown')}"
-            })
-    except: pass
-
-    # Workshops
-    try:
-        work_rows = conn.execute("SELECT * FROM workshops").fetchall()
-        for r in work_rows:
-            d = dict(r)
-            status = d.get("approval_status")
-            is_approved = False
-            if status:
-                try:
-                    s_json = json.loads(status)
-                    if s_json.get("status") == "approved": is_approved = True
-                except: pass
-            if not is_approved: continue
-
-            items.append({
-                "type": "Workshop",
-                "title": d["title"],
-                "date": d["start_date"] or "",
-                "announcement_date": d.get("announcement_date"),
-                "image_url": f"/workshops/image/{d['slug']}" if d["image_data"] else None,
-                "url": f"/activities/workshops/{d['slug']}",
-                "summary": d.get("location", "")
-            })
-    except: pass
-    
-    conn.close()
-    
-    # Sort
-    from datetime import datetime
-    
-    def parse_date(date_str):
-        if not date_str:
-            return datetime.min
-        try:
-            # Try ISO format first (for seminars/workshops)
-            # Handle potential Z or +00:00
-            dt = datetime.fromisoformat(date_str)
-            return dt.replace(tzinfo=None) # Make naive for comparison
-        except ValueError:
-            pass
-            
-        try:
-            # Try "Month DD, YYYY" (for scraped news)
-            # Sometimes there might be extra spaces or weird chars
-            clean_date = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str) # Remove ordinal suffixes if any
-            dt = datetime.strptime(clean_date.strip(), "%B %d, %Y")
-            return dt
-        except ValueError:
-            pass
-            
-        return datetime.min
-
-    # Sort key: use announcement_date if available (for seminars/workshops), fall back to date
-    def get_sort_date(item):
-        if item.get("type") in ["Seminar", "Workshop"] and item.get("announcement_date"):
-            return parse_date(item["announcement_date"])
-        return parse_date(item["date"])
-
-    items.sort(key=get_sort_date, reverse=True)
-    
-    if limit:
-        return items[:limit]
-    return items
+templates.env.globals["responsive_image"] = responsive_image
+# get_db is imported from .database
+
+# Home page: the newest HOME_ITEMS of each type
+HOME_ITEMS = 3
+
+def home_query():
+    """
+    One statement for the three home page sections: per type, the newest HOME_ITEMS approved rows
+    by sort_date (announcement date first where a type has one; today none of the tables stores it,
+    so it is the item date). Each branch is its own ORDER BY ... LIMIT read off the
+    (status, sort_date) index, so the cost does not grow with the archive, and UNION ALL sends it
+    as a single round trip on Turso as well as SQLite.
+    """
+    branches = [
+        ("News", "news n", "n", "n.date", "n.summary", "n.slug"),
+        ("Seminar", "seminars s", "s", "s.date", "s.speaker", "s.id"),
+        ("Workshop", "workshops w", "w", "w.start_date", "w.location", "w.id"),
+    ]
+    parts = []
+    for label, source, alias, date_col, extra, key in branches:
+        parts.append(
+            f"SELECT * FROM (SELECT '{label}' AS type, {alias}.slug, {alias}.title, {date_col} AS date, {extra} AS extra, "
+            f"i.hash AS image_hash, i.width AS image_width, i.height AS image_height "
+            f"FROM {source} LEFT JOIN images i ON i.id = {alias}.image_id WHERE {alias}.status = 'approved' "
+            f"ORDER BY COALESCE({alias}.sort_date, '') DESC, {key} DESC LIMIT {HOME_ITEMS})"
+        )
+    return " UNION ALL ".join(parts)
+
+HOME_QUERY = home_query()
+
+async def get_home_items(db):
+    """Home page sections {"News": [...], "Seminar": [...], "Workshop": [...]}, cached in feed_cache."""
+    sections = feed_cache.get("home")
+    if sections is not None:
+        return sections
+    generation = feed_cache.generation
+    sections = {"News": [], "Seminar": [], "Workshop": []}
+    urls = {"News": "/news/", "Seminar": "/activities/seminars/", "Workshop": "/activities/workshops/"}
+    for r in await db.fetchall(HOME_QUERY):
+        d = dict(r)
+        if d["type"] == "News":
+            summary = truncate(d["extra"], 150)
+        elif d["type"] == "Seminar":
+            summary = f"Speaker: {d['extra'] or 'Unknown'}"
+        else:
+            summary = d["extra"] or ""
+        sections[d["type"]].append({
+            "type": d["type"],
+            "title": d["title"],
+            "date": d["date"] or "",
+            "image_url": image_url(d["image_hash"]),
+            "image": responsive_image(d["image_hash"], d["image_width"], d["image_height"]),
+            "url": urls[d["type"]] + d["slug"],
+            "summary": summary
+        })
+    feed_cache.set("home", sections, generation)
+    return sections
 
 # --- Admin Routes ---
 
@@ -168,14 +100,12 @@ async def login_page(request: Request):
     return templates.TemplateResponse("admin/login.html", {"request": request})
 
 @router.post("/admin/login")
-async def login_submit(request: Request):
+async def login_submit(request: Request, db = Depends(get_db)):
     form = await request.form()
     username = form.get("username")
     password = form.get("password")
     
-    conn = get_db_connection()
-    admin = conn.execute("SELECT * FROM admins WHERE username = ?", (username,)).fetchone()
-    conn.close()
+    admin = await db.fetchone("SELECT * FROM admins WHERE username = ?", (username,))
     
     if not admin or not verify_password(password, admin['password_hash']):
         return templates.TemplateResponse("admin/login.html", {
@@ -193,26 +123,25 @@ async def logout(request: Request):
     return RedirectResponse(url="/admin/login", status_code=303)
 
 @router.get("/admin")
-async def admin_dashboard(request: Request, user = Depends(require_admin)):
-    conn = get_db_connection()
+async def admin_dashboard(request: Request, user = Depends(require_admin), db = Depends(get_db)):
     categories = ['news', 'seminars', 'workshops', 'publications', 'members']
     counts = {}
-    
+
+    # Total and pending (indexed status column) per category, all in one batch
+    statements = []
     for c in categories:
-        try:
-            # Count total
-            total = conn.execute(f"SELECT COUNT(*) FROM {c}").fetchone()[0]
-            
-            # Count pending.
-            # Using LIKE for simplicity
-            pending = conn.execute(f"SELECT COUNT(*) FROM {c} WHERE approval_status LIKE '%\"status\": \"pending_approval\"%'").fetchone()[0]
-            
-            counts[c] = {"total": total, "pending": pending}
-        except Exception as e:
-            print(f"Error counting {c}: {e}")
+        statements.append(f"SELECT COUNT(*) FROM {c}")
+        statements.append(f"SELECT COUNT(*) FROM {c} WHERE status = 'pending_approval'")
+    results = await db.batch(statements, return_exceptions=True)
+
+    for c, total, pending in zip(categories, results[0::2], results[1::2]):
+        error = next((r for r in (total, pending) if isinstance(r, Exception)), None)
+        if error:
+            print(f"Error counting {c}: {error}")
             counts[c] = {"total": 0, "pending": 0}
+        else:
+            counts[c] = {"total": total[0][0], "pending": pending[0][0]}
             
-    conn.close()
     
     return templates.TemplateResponse("admin/dashboard.html", {
         "request": request, 
@@ -220,58 +149,54 @@ async def admin_dashboard(request: Request, user = Depends(require_admin)):
         "counts": counts
     })
 
+@router.get("/admin/cache/stats")
+async def admin_cache_stats(request: Request, user = Depends(require_admin)):
+    return {"feed": feed_cache.stats(), "names": name_cache.stats(), "pages": page_cache.stats()}
+
 
 @router.get("/")
-async def home(request: Request):
-    all_items = get_aggregated_news(limit=None)
-    
-    # Filter by type
-    news = [i for i in all_items if i['type'] == 'News'][:3]
-    seminars = [i for i in all_items if i['type'] == 'Seminar'][:3]
-    workshops = [i for i in all_items if i['type'] == 'Workshop'][:3]
+@cached_page("news:list", "seminars:list", "workshops:list")
+async def home(request: Request, db = Depends(get_db)):
+    sections = await get_home_items(db)
+    # Same queries as /activities/upcoming
+    seminars, workshops = await upcoming_activities_items(db, HOME_ITEMS)
+    expire_upcoming(request, seminars, workshops)
+    upcoming = [{**s, "type": "Seminar"} for s in seminars] + [{**w, "type": "Workshop"} for w in workshops]
     
     return templates.TemplateResponse("home.html", {
         "request": request,
-        "latest_news": news,
-        "latest_seminars": seminars,
-        "latest_workshops": workshops
+        "upcoming": upcoming,
+        "latest_news": sections["News"],
+        "latest_seminars": sections["Seminar"],
+        "latest_workshops": sections["Workshop"]
     })
 
 @router.get("/news")
-async def news_list(request: Request):
-    conn = get_db_connection()
-    rows = conn.execute("SELECT * FROM news ORDER BY date DESC").fetchall()
+@cached_page("news:list")
+async def news_list(request: Request, after: str = None, limit: int = None, db = Depends(get_db)):
+    rows, cursor = await keyset_page(
+        db, "n.slug, n.title, n.date, n.summary, i.hash AS image_hash, i.width AS image_width, i.height AS image_height",
+        "news n LEFT JOIN images i ON i.id = n.image_id", ["COALESCE(n.sort_date, '')", "n.slug"], after=after, limit=limit
+    )
     
     news_items = []
     for row in rows:
         d = dict(row)
         d['type'] = 'News'
         d['url'] = f"/news/{d['slug']}"
-        d['image_url'] = f"/news/image/{d['slug']}"
+        d['image_url'] = image_url(d['image_hash'])
+        d['image'] = responsive_image(d['image_hash'], d['image_width'], d['image_height'])
+        d['summary'] = d['summary'] or ""
         
-        # Create summary from body (strip HTML)
-        clean_body = re.sub(r'<[^>]+>', '', d.get('body', ''))
-        d['summary'] = clean_body[:200] + '...' if len(clean_body) > 200 else clean_body
-        
-        if d.get('date'):
-            try:
-                # Convert ISO YYYY-MM-DD to "Month DD, YYYY"
-                dt = datetime.strptime(d['date'], "%Y-%m-%d")
-                d['display_date'] = dt.strftime("%B %d, %Y")
-            except:
-                d['display_date'] = d['date']
-        else:
-            d['display_date'] = ""
+        d['display_date'] = format_day(d.get('date'))
         news_items.append(d)
         
-    conn.close()
-    return templates.TemplateResponse("news.html", {"request": request, "news_items": news_items})
+    return templates.TemplateResponse("news.html", {"request": request, "news_items": news_items, "next_url": next_page_url(request, cursor)})
 
 @router.get("/news/{slug}")
-async def news_detail(request: Request, slug: str):
-    conn = get_db_connection()
-    row = conn.execute("SELECT * FROM news WHERE slug = ?", (slug,)).fetchone()
-    conn.close()
+@cached_page("news:{slug}")
+async def news_detail(request: Request, slug: str, db = Depends(get_db)):
+    row = await db.fetchone("SELECT n.*, i.hash AS image_hash, i.width AS image_width, i.height AS image_height FROM news n LEFT JOIN images i ON i.id = n.image_id WHERE n.slug = ?", (slug,))
     
     if not row:
          raise HTTPException(status_code=404, detail="News item not found")
@@ -286,16 +211,77 @@ async def news_detail(request: Request, slug: str):
         "item": item
     })
 
+# --- Images ---
+
+async def image_response(request, db, hash_value, variant=None):
+    """
+    Serves an image (or one of its variants) by hash, from the LRU or the database, with ETag/304.
+    Variants are negotiated on Accept: AVIF/WebP encodings when the browser takes them, else the JPEG/PNG.
+    """
+    # Representations to try, best first; small originals have no variants and stand in for them
+    candidates = []
+    if variant:
+        candidates += [f"{variant}.{fmt}" for fmt in accepted_formats(request.headers.get("accept", ""))]
+        candidates.append(variant)
+    candidates.append(None)
+    keys = [f"{hash_value}-{c}" if c else hash_value for c in candidates]
+
+    # A hash always names the same bytes, so the URL is safe to cache forever
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+    if variant:
+        headers["Vary"] = "Accept"
+    # If-None-Match may list several tags, weak or strong
+    client_etags = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+
+    for candidate, key in zip(candidates, keys):
+        etag = f'"{key}"'
+        # 304 only for the representation this request would be served (the first one that exists)
+        revalidate = etag in client_etags or "*" in client_etags
+        cached = image_cache.get(key)
+        if cached is None:
+            # When revalidating, only check that it exists, without reading the bytes
+            if candidate:
+                row = await db.fetchone(
+                    f"SELECT {'1' if revalidate else 'v.mime, v.data'} FROM image_variants v JOIN images i ON i.id = v.image_id WHERE i.hash = ? AND v.variant = ?",
+                    (hash_value, candidate)
+                )
+            else:
+                row = await db.fetchone(f"SELECT {'1' if revalidate else 'mime, data'} FROM images WHERE hash = ?", (hash_value,))
+            if row is None:
+                continue
+            if not revalidate:
+                cached = (row['mime'], row['data'])
+                image_cache.put(key, *cached)
+        if revalidate:
+            return Response(status_code=304, headers={**headers, "ETag": etag})
+        mime, data = cached
+        return Response(content=data, media_type=mime, headers={**headers, "ETag": etag})
+
+    raise HTTPException(status_code=404, detail="Image not found")
+
+@router.get("/images/{hash_value}")
+async def serve_image(request: Request, hash_value: str, db = Depends(get_db)):
+    return await image_response(request, db, hash_value)
+
+@router.get("/images/{hash_value}/{variant}")
+async def serve_image_variant(request: Request, hash_value: str, variant: str, db = Depends(get_db)):
+    if variant not in VARIANT_SIZES:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return await image_response(request, db, hash_value, variant)
+
+async def redirect_to_image(db, table, slug):
+    """Old slug-based image URLs: point at the current hashed URL (not cacheable, the image may change)."""
+    row = await db.fetchone(
+        f"SELECT i.hash FROM {table} t JOIN images i ON i.id = t.image_id WHERE t.slug = ?",
+        (slug,)
+    )
+    if row is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return RedirectResponse(url=image_url(row['hash']), status_code=302, headers={"Cache-Control": "no-cache"})
+
 @router.get("/news/image/{slug}")
-async def news_image(slug: str):
-    conn = get_db_connection()
-    row = conn.execute("SELECT image_data, image_mime FROM news WHERE slug = ?", (slug,)).fetchone()
-    conn.close()
-    
-    if row and row['image_data']:
-         return Response(content=row['image_data'], media_type=row['image_mime'], headers={"Cache-Control": "public, max-age=31536000, immutable"})
-    else:
-         raise HTTPException(status_code=404, detail="Image not found")
+async def news_image(slug: str, db = Depends(get_db)):
+    return await redirect_to_image(db, "news", slug)
 
 
 
@@ -326,89 +312,108 @@ async def runnable_model(request: Request):
 
 
 @router.get("/resources/publications")
-async def publications(request: Request):
-    conn = get_db_connection()
-    rows = conn.execute("SELECT * FROM publications").fetchall()
-    conn.close()
+@cached_page("publications:list")
+async def publications(request: Request, after: str = None, limit: int = None, db = Depends(get_db)):
+    # Oldest first (the order they were added in)
+    rows, cursor = await keyset_page(
+        db, "id, title, authors, description, year, link", "publications", ["COALESCE(created_at, '')", "id"],
+        where="status = 'approved'", descending=False, after=after, limit=limit
+    )
     
-    pubs = []
-    for row in rows:
-        p = dict(row)
-        status = p.get("approval_status")
-        is_approved = False
-        if status:
-            try:
-                s_json = json.loads(status)
-                if s_json.get("status") == "approved": is_approved = True
-            except: pass
-        if is_approved:
-            pubs.append(p)
+    pubs = [dict(row) for row in rows]
+
+    return templates.TemplateResponse("publications.html", {"request": request, "publications": pubs, "next_url": next_page_url(request, cursor)})
 
-    return templates.TemplateResponse("publications.html", {"request": request, "publications": pubs})
 
 
+# --- Upcoming / past activities ---
+# Both views are range queries on the start time, served by the (status, start) indexes
+# (app/migrations/0008_listing_indexes.py): upcoming reads forward from the cutoff, past reads backward from it.
+
+UPCOMING_LIMIT = 20
+
+def seminar_item(row):
+    s = dict(row)
+    s["display_date"], _ = seminar_time(s.get("start_datetime_utc"), s.get("date"), s.get("time"))
+    s["url"] = f"/activities/seminars/{s['slug']}"
+    return s
+
+def workshop_item(row):
+    w = dict(row)
+    w["display_date"] = format_date_range(w.get("start_date"), w.get("end_date"))
+    w["url"] = f"/activities/workshops/{w['slug']}"
+    return w
+
+def upcoming_seminars_query(limit):
+    """Approved seminars that are not over yet, soonest first: (sql, params)."""
+    return (
+        "SELECT slug, title, speaker, date, time, start_datetime_utc FROM seminars WHERE status = 'approved' AND COALESCE(start_datetime_utc, '') >= ? ORDER BY COALESCE(start_datetime_utc, ''), id LIMIT ?",
+        (seminar_cutoff(), limit)
+    )
+
+def upcoming_workshops_query(limit):
+    """Approved workshops starting today or later, soonest first: (sql, params)."""
+    return (
+        "SELECT slug, title, start_date, end_date, location FROM workshops WHERE status = 'approved' AND COALESCE(start_date, '') >= ? ORDER BY COALESCE(start_date, ''), id LIMIT ?",
+        (workshop_cutoff(), limit)
+    )
+
+async def upcoming_seminars(db, limit=UPCOMING_LIMIT):
+    return [seminar_item(r) for r in await db.fetchall(*upcoming_seminars_query(limit))]
+
+async def upcoming_workshops(db, limit=UPCOMING_LIMIT):
+    return [workshop_item(r) for r in await db.fetchall(*upcoming_workshops_query(limit))]
+
+def expire_upcoming(request, seminars=(), workshops=()):
+    """
+    The cached page changes when its first upcoming seminar or workshop stops being upcoming
+    (the lists are soonest first), so it is not cached past that point.
+    """
+    if seminars:
+        expire_page_at(request, seminar_time(seminars[0].get("start_datetime_utc"))[1])
+    if workshops:
+        expire_page_at(request, workshop_over_at(workshops[0].get("start_date")))
+
+async def upcoming_activities_items(db, limit):
+    """Upcoming seminars and workshops, read in one batch."""
+    seminar_rows, workshop_rows = await db.batch([upcoming_seminars_query(limit), upcoming_workshops_query(limit)])
+    return [seminar_item(r) for r in seminar_rows], [workshop_item(r) for r in workshop_rows]
+
+@router.get("/activities/upcoming")
+@cached_page("seminars:list", "workshops:list")
+async def upcoming_activities(request: Request, limit: int = 5, db = Depends(get_db)):
+    limit = max(1, min(limit, UPCOMING_LIMIT))
+    seminars, workshops = await upcoming_activities_items(db, limit)
+    expire_upcoming(request, seminars, workshops)
+    return JSONResponse({
+        "seminars": [{k: s[k] for k in ("title", "speaker", "display_date", "start_datetime_utc", "url")} for s in seminars],
+        "workshops": [{k: w[k] for k in ("title", "location", "display_date", "start_date", "end_date", "url")} for w in workshops],
+    })
 
 @router.get("/activities/seminars", response_class=HTMLResponse)
-async def seminars_page(request: Request):
-    conn = get_db_connection()
-    # Sort by date DESC so newest first
-    seminars_rows = conn.execute("SELECT * FROM seminars ORDER BY date DESC").fetchall()
-    conn.close()
-    
-    # Process for display
-    seminars = []
-    eastern = pytz.timezone('US/Eastern')
+@cached_page("seminars:list")
+async def seminars_page(request: Request, after: str = None, limit: int = None, db = Depends(get_db)):
+    # Upcoming seminars on the first page, soonest first
+    upcoming = await upcoming_seminars(db) if not after else []
+    expire_upcoming(request, seminars=upcoming)
+    # Past seminars, newest first (seminars without a start time at the end)
+    seminars_rows, cursor = await keyset_page(
+        db, "slug, title, speaker, date, time, start_datetime_utc", "seminars", ["COALESCE(start_datetime_utc, '')", "id"],
+        where="status = 'approved' AND COALESCE(start_datetime_utc, '') < ?", params=(seminar_cutoff(),), after=after, limit=limit
+    )
     
-    for row in seminars_rows:
-        s = dict(row)
-        
-        # Check approval
-        status = s.get("approval_status")
-        is_approved = False
-        if status:
-            try:
-                s_json = json.loads(status)
-                if s_json.get("status") == "approved": is_approved = True
-            except: pass
-        if not is_approved: continue
-        
-        # Format date for display
-        s["display_date"] = "Date TBD"
-        if s.get("start_datetime_utc"):
-            try:
-                utc_dt = datetime.fromisoformat(s["start_datetime_utc"])
-                if utc_dt.tzinfo is None:
-                    utc_dt = pytz.UTC.localize(utc_dt)
-                et_dt = utc_dt.astimezone(eastern)
-                s["display_date"] = et_dt.strftime("%B %d, %Y, %I:%M %p %Z")
-            except:
-                pass
-        elif s.get("date") and s.get("time"):
-             # Fallback to date + time (naive)
-             try:
-                 # Assume existing time is whatever the user entered, display as is
-                 dt = datetime.strptime(f"{s['date']} {s['time']}", "%Y-%m-%d %H:%M")
-                 s["display_date"] = dt.strftime("%B %d, %Y, %I:%M %p")
-             except:
-                 s["display_date"] = f"{s['date']} at {s['time']}"
-        elif s.get("date"):
-             s["display_date"] = s["date"]
-
-        seminars.append(s)
-
-    return templates.TemplateResponse("seminars.html", {"request": request, "seminars": seminars})
+    seminars = [seminar_item(row) for row in seminars_rows]
+
+    return templates.TemplateResponse("seminars.html", {"request": request, "upcoming": upcoming, "seminars": seminars, "next_url": next_page_url(request, cursor)})
 
 @router.get("/activities/seminars/{slug}", response_class=HTMLResponse)
-async def seminar_detail(request: Request, slug: str):
-    conn = get_db_connection()
-    seminar_row = conn.execute("SELECT * FROM seminars WHERE slug = ?", (slug,)).fetchone()
-    conn.close()
+async def seminar_detail(request: Request, slug: str, db = Depends(get_db)):
+    seminar_row = await db.fetchone("SELECT s.*, i.hash AS image_hash, i.width AS image_width, i.height AS image_height FROM seminars s LEFT JOIN images i ON i.id = s.image_id WHERE s.slug = ?", (slug,))
     
     if seminar_row is None:
         raise HTTPException(status_code=404, detail="Seminar not found")
         
     s = dict(seminar_row)
-    s['is_over'] = False
     
     # Unpack related links
     s['related_links_list'] = []
@@ -417,33 +422,9 @@ async def seminar_detail(request: Request, slug: str):
             s['related_links_list'] = json.loads(s['related_links'])
         except: pass
 
-    # Date Display Logic
-    eastern = pytz.timezone('US/Eastern')
-    s["display_date"] = "Date TBD"
-    dt_aware = None
-
-    if s.get("start_datetime_utc"):
-        try:
-            utc_dt = datetime.fromisoformat(s["start_datetime_utc"])
-            if utc_dt.tzinfo is None:
-                utc_dt = pytz.UTC.localize(utc_dt)
-            dt_aware = utc_dt.astimezone(eastern)
-            s["display_date"] = dt_aware.strftime("%B %d, %Y, %I:%M %p %Z")
-        except: pass
-    elif s.get("date") and s.get("time"):
-         try:
-             dt = datetime.strptime(f"{s['date']} {s['time']}", "%Y-%m-%d %H:%M")
-             # Naive fallback
-             s["display_date"] = dt.strftime("%B %d, %Y, %I:%M %p")
-             dt_aware = eastern.localize(dt) # Assume ET for is_over check if naive?
-         except:
-             s["display_date"] = f"{s['date']} at {s['time']}"
-
-    # Check if over
-    if dt_aware:
-        now_eastern = datetime.now(eastern)
-        if now_eastern > dt_aware + timedelta(hours=24):
-            s['is_over'] = True
+    # Date display and is_over (formatting is memoized per stored value, app/dates.py)
+    s["display_date"], over_at = seminar_time(s.get("start_datetime_utc"), s.get("date"), s.get("time"))
+    s['is_over'] = is_over(over_at)
         
     # Process recording URL for embed
     s['has_recording'] = False
@@ -463,74 +444,28 @@ async def seminar_detail(request: Request, slug: str):
     return templates.TemplateResponse("seminar_detail.html", {"request": request, "seminar": s})
 
 @router.get("/seminars/image/{slug}")
-async def seminar_image(slug: str):
-    conn = get_db_connection()
-    seminar = conn.execute('SELECT image_data, image_mime FROM seminars WHERE slug = ?', (slug,)).fetchone()
-    conn.close()
-    
-    if seminar is None or seminar['image_data'] is None:
-        raise HTTPException(status_code=404, detail="Image not found")
-        
-    return Response(content=seminar['image_data'], media_type=seminar['image_mime'], headers={"Cache-Control": "public, max-age=31536000, immutable"})
+async def seminar_image(slug: str, db = Depends(get_db)):
+    return await redirect_to_image(db, "seminars", slug)
 
 @router.get("/activities/workshops", response_class=HTMLResponse)
-async def workshops(request: Request):
-    conn = get_db_connection()
-    # Sort by start_date DESC
-    rows = conn.execute("SELECT * FROM workshops ORDER BY start_date DESC").fetchall()
-    conn.close()
+@cached_page("workshops:list")
+async def workshops(request: Request, after: str = None, limit: int = None, db = Depends(get_db)):
+    # Upcoming workshops on the first page, soonest first
+    upcoming = await upcoming_workshops(db) if not after else []
+    expire_upcoming(request, workshops=upcoming)
+    # Past workshops by start_date DESC (workshops without a date last)
+    rows, cursor = await keyset_page(
+        db, "slug, title, start_date, end_date, location", "workshops", ["COALESCE(start_date, '')", "id"],
+        where="status = 'approved' AND COALESCE(start_date, '') < ?", params=(workshop_cutoff(),), after=after, limit=limit
+    )
     
-    workshops = []
-    for row in rows:
-        w = dict(row)
-        
-        # Check approval
-        status = w.get("approval_status")
-        is_approved = False
-        if status:
-            try:
-                s_json = json.loads(status)
-                if s_json.get("status") == "approved": is_approved = True
-            except: pass
-        if not is_approved: continue
-
-        # Format dates
-        # start_date, end_date are ISO strings or None
-        if w.get("start_date"):
-            try:
-                dt1 = datetime.fromisoformat(w["start_date"])
-                start_fmt = dt1.strftime("%B %-d, %Y")
-                
-                if w.get("end_date"):
-                    dt2 = datetime.fromisoformat(w["end_date"])
-                    if dt1.year == dt2.year:
-                        if dt1.month == dt2.month:
-                             # July 28 - 30, 2025
-                             date_str = f"{dt1.strftime('%B %-d')} - {dt2.strftime('%-d, %Y')}"
-                        else:
-                             # July 28 - August 10, 2025
-                             date_str = f"{dt1.strftime('%B %-d')} - {dt2.strftime('%B %-d, %Y')}"
-                    else:
-                        # Dec 2024 - Jan 2025
-                        date_str = f"{dt1.strftime('%B %-d, %Y')} - {dt2.strftime('%B %-d, %Y')}"
-                else:
-                    date_str = start_fmt
-                
-                w["display_date"] = date_str
-            except:
-                w["display_date"] = w["start_date"]
-        else:
-             w["display_date"] = "Date TBD"
-        
-        workshops.append(w)
+    workshops = [workshop_item(row) for row in rows]
 
-    return templates.TemplateResponse("workshops.html", {"request": request, "workshops": workshops})
+    return templates.TemplateResponse("workshops.html", {"request": request, "upcoming": upcoming, "workshops": workshops, "next_url": next_page_url(request, cursor)})
 
 @router.get("/activities/workshops/{slug}", response_class=HTMLResponse)
-async def workshop_detail(request: Request, slug: str):
-    conn = get_db_connection()
-    row = conn.execute("SELECT * FROM workshops WHERE slug = ?", (slug,)).fetchone()
-    conn.close()
+async def workshop_detail(request: Request, slug: str, db = Depends(get_db)):
+    row = await db.fetchone("SELECT w.*, i.hash AS image_hash, i.width AS image_width, i.height AS image_height FROM workshops w LEFT JOIN images i ON i.id = w.image_id WHERE w.slug = ?", (slug,))
     
     if row is None:
         raise HTTPException(status_code=404, detail="Workshop not found")
@@ -544,64 +479,57 @@ async def workshop_detail(request: Request, slug: str):
         except:
              w['related_links_list'] = []
 
-    # Reuse formatting logic (should ideally be a helper function)
-    if w.get("start_date"):
-        try:
-            dt1 = datetime.fromisoformat(w["start_date"])
-            if w.get("end_date"):
-                dt2 = datetime.fromisoformat(w["end_date"])
-                if dt1.year == dt2.year:
-                    if dt1.month == dt2.month:
-                         w["display_date"] = f"{dt1.strftime('%B %-d')} - {dt2.strftime('%-d, %Y')}"
-                    else:
-                         w["display_date"] = f"{dt1.strftime('%B %-d')} - {dt2.strftime('%B %-d, %Y')}"
-                else:
-                    w["display_date"] = f"{dt1.strftime('%B %-d, %Y')} - {dt2.strftime('%B %-d, %Y')}"
-            else:
-                w["display_date"] = dt1.strftime("%B %-d, %Y")
-        except:
-             w["display_date"] = w["start_date"]
-    else:
-         w["display_date"] = "Date TBD"
+    w["display_date"] = format_date_range(w.get("start_date"), w.get("end_date"))
 
     return templates.TemplateResponse("workshop_detail.html", {"request": request, "workshop": w})
 
 @router.get("/workshops/image/{slug}")
-async def workshop_image(slug: str):
-    conn = get_db_connection()
-    row = conn.execute('SELECT image_data, image_mime FROM workshops WHERE slug = ?', (slug,)).fetchone()
-    conn.close()
-    
-    if row is None or row['image_data'] is None:
-        # Return a placeholder or 404? 
-        # For now 404
-        raise HTTPException(status_code=404, detail="Image not found")
-        
-    return Response(content=row['image_data'], media_type=row['image_mime'], headers={"Cache-Control": "public, max-age=31536000, immutable"})
+async def workshop_image(slug: str, db = Depends(get_db)):
+    return await redirect_to_image(db, "workshops", slug)
+
+@router.get("/search", response_class=HTMLResponse)
+async def search_page(request: Request, q: str = "", page: int = 1, db = Depends(get_db)):
+    # Not page-cached: every query string would be its own entry. The FTS index answers in a few ms.
+    page = max(1, page)
+    try:
+        results = await search(db, q, PAGE_SIZE, (page - 1) * PAGE_SIZE)
+        available = True
+    except Exception as e:
+        # No search_index yet (scripts/update_schema.py creates it)
+        print(f"Warning: search failed: {e}")
+        results, available = [], False
+
+    next_url = prev_url = None
+    if len(results) > PAGE_SIZE:
+        results = results[:PAGE_SIZE]
+        next_url = f"/search?{urlencode({'q': q, 'page': page + 1})}"
+    if page > 1:
+        prev_url = f"/search?{urlencode({'q': q, 'page': page - 1})}"
+
+    return templates.TemplateResponse("search.html", {
+        "request": request, "q": q, "results": results, "available": available,
+        "next_url": next_url, "prev_url": prev_url
+    })
+
+@router.get("/names/autocomplete")
+async def names_autocomplete(request: Request, q: str = "", limit: int = AUTOCOMPLETE_LIMIT, db = Depends(get_db)):
+    # Members and seminar speakers for everyone; admins also get mailing contacts
+    index = await get_name_index(db)
+    limit = max(1, min(limit, MAX_AUTOCOMPLETE_LIMIT))
+    return JSONResponse({"results": index.lookup(q, limit, public_only=not request.session.get("user"))})
 
 @router.get("/membership")
 async def membership(request: Request):
     return templates.TemplateResponse("membership.html", {"request": request})
 
 @router.get("/members", response_class=HTMLResponse)
-async def members_list(request: Request):
-    conn = get_db_connection()
-    rows = conn.execute("SELECT * FROM members ORDER BY sort_order ASC").fetchall()
-    conn.close()
+@cached_page("members:list")
+async def members_list(request: Request, db = Depends(get_db)):
+    rows = await db.fetchall("SELECT m.slug, m.name, m.affiliation, m.email, m.links, i.hash AS image_hash, i.width AS image_width, i.height AS image_height FROM members m LEFT JOIN images i ON i.id = m.image_id WHERE m.status = 'approved' ORDER BY m.sort_order ASC")
     
     members_list = []
     for row in rows:
         m = dict(row)
-        
-        # Check approval
-        status = m.get("approval_status")
-        is_approved = False
-        if status:
-            try:
-                s_json = json.loads(status)
-                if s_json.get("status") == "approved": is_approved = True
-            except: pass
-        if not is_approved: continue
 
         if m['links']:
             try:
@@ -613,10 +541,8 @@ async def members_list(request: Request):
     return templates.TemplateResponse("members.html", {"request": request, "members": members_list})
 
 @router.get("/members/{slug}", response_class=HTMLResponse)
-async def member_detail(request: Request, slug: str):
-    conn = get_db_connection()
-    row = conn.execute("SELECT * FROM members WHERE slug = ?", (slug,)).fetchone()
-    conn.close()
+async def member_detail(request: Request, slug: str, db = Depends(get_db)):
+    row = await db.fetchone("SELECT m.*, i.hash AS image_hash, i.width AS image_width, i.height AS image_height FROM members m LEFT JOIN images i ON i.id = m.image_id WHERE m.slug = ?", (slug,))
     
     if row is None:
         raise HTTPException(status_code=404, detail="Member not found")
@@ -634,32 +560,17 @@ async def member_detail(request: Request, slug: str):
     return templates.TemplateResponse("member_detail.html", {"request": request, "member": m})
 
 @router.get("/members/image/{slug}")
-async def member_image(slug: str):
-    conn = get_db_connection()
-    row = conn.execute("SELECT image_data, image_mime FROM members WHERE slug = ?", (slug,)).fetchone()
-    conn.close()
-    
-    if row and row['image_data']:
-         return Response(content=row['image_data'], media_type=row['image_mime'], headers={"Cache-Control": "public, max-age=31536000, immutable"})
-    else:
-         raise HTTPException(status_code=404, detail="Image not found")
+async def member_image(slug: str, db = Depends(get_db)):
+    return await redirect_to_image(db, "members", slug)
 
 @router.get("/admin/approvals")
-async def admin_approvals(request: Request, user = Depends(require_admin)):
-    conn = get_db_connection()
+async def admin_approvals(request: Request, user = Depends(require_admin), db = Depends(get_db)):
     tables = ['news', 'seminars', 'workshops', 'publications', 'members']
     pending_items = []
     
-    for t in tables:
-        rows = conn.execute(f"SELECT *, '{t}' as table_name FROM {t}").fetchall()
-        for r in rows:
-            d = dict(r)
-            try:
-                s = json.loads(d['approval_status'])
-                if s.get('status') == 'pending_approval':
-                    pending_items.append(d)
-            except: pass
-    conn.close()
+    results = await db.batch([f"SELECT *, '{t}' as table_name FROM {t} WHERE status = 'pending_approval'" for t in tables])
+    for rows in results:
+        pending_items.extend(dict(r) for r in rows)
     
     return templates.TemplateResponse("admin/approvals.html", {
         "request": request,
@@ -667,11 +578,10 @@ async def admin_approvals(request: Request, user = Depends(require_admin)):
     })
 
 @router.post("/admin/approve/{table}/{slug}")
-async def approve_item(request: Request, table: str, slug: str, user = Depends(require_admin)):
+async def approve_item(request: Request, table: str, slug: str, user = Depends(require_admin), db = Depends(get_db)):
     if table not in ['news', 'seminars', 'workshops', 'publications', 'members']:
         raise HTTPException(status_code=400, detail="Invalid table")
         
-    conn = get_db_connection()
     # Update status to approved
     approved_status = json.dumps({
         "status": "approved",
@@ -679,9 +589,8 @@ async def approve_item(request: Request, table: str, slug: str, user = Depends(r
         "at": datetime.now().isoformat()
     })
     
-    conn.execute(f"UPDATE {table} SET approval_status = ? WHERE slug = ?", (approved_status, slug))
-    conn.commit()
-    conn.close()
+    await db.write(lambda conn: conn.execute(f"UPDATE {table} SET approval_status = ?, status = 'approved' WHERE slug = ?", (approved_status, slug)))
+    invalidate_content(table, slug)
     
     return RedirectResponse(url="/admin/approvals", status_code=303)
 
@@ -709,7 +618,8 @@ async def submit_news_post(
     date: str = Form(...),
     body: str = Form(...),
     related_links: str = Form(None), # JSON string or text
-    image: UploadFile = File(None)
+    image: UploadFile = File(None),
+    db = Depends(get_db)
 ):
     slug = generate_slug(title)
         
@@ -735,15 +645,20 @@ async def submit_news_post(
     status = json.dumps({"status": "pending_approval", "at": datetime.now().isoformat()})
     created_at = datetime.now().isoformat()
     
-    conn = get_db_connection()
-    try:
+    plain_text, summary = summarize(body)
+    
+    def insert(conn):
+        image_id = store_image(conn, upload) if upload else None
         conn.execute(
-            "INSERT INTO news (slug, title, date, body, image_data, image_mime, related_links, approval_status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (slug, title, date, body, image_data, image_mime, links_json, status, created_at)
+            "INSERT INTO news (slug, title, date, sort_date, body, plain_text, summary, image_id, related_links, approval_status, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending_approval', ?)",
+            (slug, title, date, normalize_date(date), body, plain_text, summary, image_id, links_json, status, created_at)
         )
-        conn.commit()
+
+    try:
+        upload = await prepare_image(db, image_data, image_mime) if image_data else None
+        await db.write(insert)
+        invalidate_content("news", slug)
     except Exception as e:
-        conn.close()
         today = datetime.now().date().isoformat()
         return templates.TemplateResponse("news_form.html", {
             "request": request, 
@@ -754,7 +669,6 @@ async def submit_news_post(
             "is_admin": False
         })
         
-    conn.close()
     return templates.TemplateResponse("submit_success.html", {"request": request})
 
 @router.get("/submit/seminars")
@@ -779,9 +693,9 @@ async def submit_seminar(
     timezone: str = Form(None),
     location: str = Form(None), # Optional now
     related_links: str = Form(None), # Replaces link
-    image: UploadFile = File(None)
+    image: UploadFile = File(None),
+    db = Depends(get_db)
 ):
-    conn = get_db_connection()
     
     # Handle Image
     image_data = None
@@ -806,7 +720,7 @@ async def submit_seminar(
         local_dt = datetime.strptime(local_dt_str, "%Y-%m-%d %H:%M")
         
         if timezone:
-            tz = pytz.timezone(timezone)
+            tz = get_timezone(timezone)
             local_dt = tz.localize(local_dt)
             utc_dt = local_dt.astimezone(pytz.UTC)
             start_datetime_utc = utc_dt.isoformat()
@@ -822,14 +736,18 @@ async def submit_seminar(
     
     status = json.dumps({"status": "pending_approval", "submitted_at": datetime.now().isoformat()})
     
-    try:
+    def insert(conn):
+        image_id = store_image(conn, upload) if upload else None
         conn.execute(
-            "INSERT INTO seminars (slug, title, speaker, affiliation, abstract, date, time, location, related_links, start_datetime_utc, image_data, image_mime, approval_status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (slug, title, speaker, affiliation, abstract, date, time, location, clean_links_json, start_datetime_utc, image_data, image_mime, status, datetime.now().isoformat())
+            "INSERT INTO seminars (slug, title, speaker, affiliation, abstract, plain_text, summary, date, sort_date, time, location, related_links, start_datetime_utc, image_id, approval_status, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending_approval', ?)",
+            (slug, title, speaker, affiliation, abstract, *summarize(abstract), date, normalize_date(date), time, location, clean_links_json, start_datetime_utc, image_id, status, datetime.now().isoformat())
         )
-        conn.commit()
+
+    try:
+        upload = await prepare_image(db, image_data, image_mime) if image_data else None
+        await db.write(insert)
+        invalidate_content("seminars", slug)
     except Exception as e:
-        conn.close()
         return templates.TemplateResponse("seminar_form.html", {
             "request": request, 
             "error": str(e),
@@ -838,7 +756,6 @@ async def submit_seminar(
             "is_admin": False
         })
     
-    conn.close()
     return templates.TemplateResponse("submit_success.html", {"request": request})
 
 @router.get("/submit/workshops")
@@ -859,9 +776,9 @@ async def submit_workshop(
     end_date: str = Form(None),
     location: str = Form(...),
     related_links: str = Form(None), # Replaces link
-    image: UploadFile = File(None)
+    image: UploadFile = File(None),
+    db = Depends(get_db)
 ):
-    conn = get_db_connection()
     
     # Handle Image
     image_data = None
@@ -881,14 +798,18 @@ async def submit_workshop(
     slug = re.sub(r'[^a-z0-9]+', '-', f"{title}".lower()).strip('-')
     status = json.dumps({"status": "pending_approval", "submitted_at": datetime.now().isoformat()})
 
-    try:
+    def insert(conn):
+        image_id = store_image(conn, upload) if upload else None
         conn.execute(
-            "INSERT INTO workshops (slug, title, description, start_date, end_date, location, related_links, image_data, image_mime, approval_status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (slug, title, description, start_date, end_date, location, clean_links_json, image_data, image_mime, status, datetime.now().isoformat())
+            "INSERT INTO workshops (slug, title, description, plain_text, summary, start_date, sort_date, end_date, location, related_links, image_id, approval_status, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending_approval', ?)",
+            (slug, title, description, *summarize(description), start_date, normalize_date(start_date), end_date, location, clean_links_json, image_id, status, datetime.now().isoformat())
         )
-        conn.commit()
+
+    try:
+        upload = await prepare_image(db, image_data, image_mime) if image_data else None
+        await db.write(insert)
+        invalidate_content("workshops", slug)
     except Exception as e:
-        conn.close()
         return templates.TemplateResponse("workshop_form.html", {
             "request": request, 
             "error": str(e),
@@ -897,7 +818,6 @@ async def submit_workshop(
             "is_admin": False
         })
     
-    conn.close()
     return templates.TemplateResponse("submit_success.html", {"request": request, "message": "Workshop submitted for approval!"})
 
 @router.get("/submit/publications")
@@ -910,7 +830,7 @@ async def submit_publication_form(request: Request):
     })
 
 @router.post("/submit/publications")
-async def submit_publication_post(request: Request):
+async def submit_publication_post(request: Request, db = Depends(get_db)):
     form = await request.form()
     title = form.get("title")
     authors = form.get("authors")
@@ -921,15 +841,13 @@ async def submit_publication_post(request: Request):
     slug = generate_slug(title)
     status = json.dumps({"status": "pending_approval", "at": datetime.now().isoformat()})
     
-    conn = get_db_connection()
     try:
-        conn.execute(
-            "INSERT INTO publications (slug, title, authors, description, year, link, approval_status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        await db.write(lambda conn: conn.execute(
+            "INSERT INTO publications (slug, title, authors, description, year, link, approval_status, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, 'pending_approval', ?)",
             (slug, title, authors, description, year, link, status, datetime.now().isoformat())
-        )
-        conn.commit()
+        ))
+        invalidate_content("publications", slug)
     except Exception as e:
-        conn.close()
         return templates.TemplateResponse("publication_form.html", {
             "request": request, 
             "error": str(e),
@@ -937,7 +855,6 @@ async def submit_publication_post(request: Request):
             "form_action": "/submit/publications",
             "is_admin": False
         })
-    conn.close()
     return templates.TemplateResponse("submit_success.html", {"request": request})
 
 @router.get("/submit/members")
@@ -958,7 +875,8 @@ async def submit_member_post(
     education: str = Form(None),
     statement: str = Form(None),
     links: str = Form(None), # Valid JSON expected
-    image: UploadFile = File(None)
+    image: UploadFile = File(None),
+    db = Depends(get_db)
 ):
     # Manual Validation
     field_errors = {}
@@ -1007,15 +925,18 @@ async def submit_member_post(
              
     clean_links_json = json.dumps(json.loads(clean_links_str)) if clean_links_str else None
 
-    conn = get_db_connection()
-    try:
+    def insert(conn):
+        image_id = store_image(conn, upload) if upload else None
         conn.execute(
-            "INSERT INTO members (slug, name, affiliation, email, education, statement, links, image_data, image_mime, approval_status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (slug, name, affiliation, email, education, statement, clean_links_json, image_data, image_mime, status, datetime.now().isoformat())
+            "INSERT INTO members (slug, name, affiliation, email, education, statement, links, image_id, approval_status, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending_approval', ?)",
+            (slug, name, affiliation, email, education, statement, clean_links_json, image_id, status, datetime.now().isoformat())
         )
-        conn.commit()
+
+    try:
+        upload = await prepare_image(db, image_data, image_mime) if image_data else None
+        await db.write(insert)
+        invalidate_content("members", slug)
     except Exception as e:
-        conn.close()
         return templates.TemplateResponse("member_form.html", {
             "request": request, 
             "error": str(e),
@@ -1032,64 +953,58 @@ async def submit_member_post(
             }
         })
         
-    conn.close()
     return templates.TemplateResponse("submit_success.html", {"request": request})
 
 
 
 
 @router.get("/admin/contacts")
-async def admin_contacts(request: Request, user = Depends(require_admin)):
-    conn = get_db_connection()
-    contacts = conn.execute("SELECT * FROM contacts ORDER BY name").fetchall()
-    conn.close()
+async def admin_contacts(request: Request, user = Depends(require_admin), db = Depends(get_db)):
+    contacts = await db.fetchall("SELECT * FROM contacts ORDER BY name")
     return templates.TemplateResponse("admin/contacts.html", {"request": request, "contacts": [dict(c) for c in contacts]})
 
 @router.post("/admin/contacts/add")
-async def add_contact(request: Request, user = Depends(require_admin)):
+async def add_contact(request: Request, user = Depends(require_admin), db = Depends(get_db)):
     form = await request.form()
     name = form.get("name")
     email = form.get("email")
     affiliation = form.get("affiliation")
     
-    conn = get_db_connection()
     try:
-        conn.execute("INSERT INTO contacts (name, email, affiliation) VALUES (?, ?, ?)", (name, email, affiliation))
-        conn.commit()
+        await db.write(lambda conn: conn.execute("INSERT INTO contacts (name, email, affiliation) VALUES (?, ?, ?)", (name, email, affiliation)))
+        invalidate_content("contacts")
     except Exception as e:
         # Handle duplicate email or other error
         pass
-    conn.close()
     return RedirectResponse(url="/admin/contacts", status_code=303)
 
 
 @router.post("/admin/contacts/delete/{contact_id}")
-async def delete_contact(request: Request, contact_id: int, user = Depends(require_admin)):
-    conn = get_db_connection()
+async def delete_contact(request: Request, contact_id: int, user = Depends(require_admin), db = Depends(get_db)):
     try:
-        conn.execute("DELETE FROM contacts WHERE id = ?", (contact_id,))
-        conn.commit()
+        await db.write(lambda conn: conn.execute("DELETE FROM contacts WHERE id = ?", (contact_id,)))
+        invalidate_content("contacts")
     except Exception as e:
         print(f"Error deleting contact: {e}")
-    conn.close()
     return RedirectResponse(url="/admin/contacts", status_code=303)
 
 
 # --- Generic Admin Routes (Must be last to avoid capturing specific routes) ---
 
 @router.get("/admin/{category}")
-async def admin_list_category(request: Request, category: str, user = Depends(require_admin)):
+async def admin_list_category(request: Request, category: str, user = Depends(require_admin), db = Depends(get_db)):
     allowed_categories = ['news', 'seminars', 'workshops', 'publications', 'members']
     if category not in allowed_categories:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    conn = get_db_connection()
     try:
-        items = conn.execute(f"SELECT * FROM {category} ORDER BY created_at DESC").fetchall()
+        if category in IMAGE_TABLES:
+            items = await db.fetchall(f"SELECT t.*, i.hash AS image_hash, i.width AS image_width, i.height AS image_height FROM {category} t LEFT JOIN images i ON i.id = t.image_id ORDER BY t.created_at DESC")
+        else:
+            items = await db.fetchall(f"SELECT * FROM {category} ORDER BY created_at DESC")
     except Exception as e:
         print(f"Error fetching {category}: {e}")
         items = []
-    conn.close()
     
     return templates.TemplateResponse("admin/list_generic.html", {
         "request": request, 
@@ -1098,19 +1013,17 @@ async def admin_list_category(request: Request, category: str, user = Depends(re
     })
 
 @router.post("/admin/{category}/{item_id}/approve")
-async def admin_approve_item(request: Request, category: str, item_id: str, user = Depends(require_admin)):
+async def admin_approve_item(request: Request, category: str, item_id: str, user = Depends(require_admin), db = Depends(get_db)):
     allowed_categories = ['news', 'seminars', 'workshops', 'publications', 'members']
     if category not in allowed_categories:
         raise HTTPException(status_code=404, detail="Category not found")
         
-    conn = get_db_connection()
     status = json.dumps({"status": "approved", "at": datetime.now().isoformat(), "by": user['username']})
     
     pk_col = "slug" if category == "news" else "id"
     # Ensure item_id is treated as string for slug, int for id if needed?
-    conn.execute(f"UPDATE {category} SET approval_status = ? WHERE {pk_col} = ?", (status, item_id))
-    conn.commit()
-    conn.close()
+    await db.write(lambda conn: conn.execute(f"UPDATE {category} SET approval_status = ?, status = 'approved' WHERE {pk_col} = ?", (status, item_id)))
+    invalidate_content(category, item_id)
     
     return RedirectResponse(url=f"/admin/{category}", status_code=303)
 
@@ -1120,31 +1033,38 @@ async def admin_delete_item_get(request: Request, category: str, item_id: str, u
     return RedirectResponse(url=f"/admin/{category}", status_code=303)
 
 @router.post("/admin/{category}/{item_id}/delete")
-async def admin_delete_item(request: Request, category: str, item_id: str, user = Depends(require_admin)):
+async def admin_delete_item(request: Request, category: str, item_id: str, user = Depends(require_admin), db = Depends(get_db)):
     allowed_categories = ['news', 'seminars', 'workshops', 'publications', 'members']
     if category not in allowed_categories:
         raise HTTPException(status_code=404, detail="Category not found")
         
-    conn = get_db_connection()
     pk_col = "slug" if category == "news" else "id"
     # Ensure item_id string/int?
-    conn.execute(f"DELETE FROM {category} WHERE {pk_col} = ?", (item_id,))
-    conn.commit()
-    conn.close()
+    def delete(conn):
+        old_image = None
+        if category in IMAGE_TABLES:
+            old_image = conn.execute(f"SELECT image_id FROM {category} WHERE {pk_col} = ?", (item_id,)).fetchone()
+        conn.execute(f"DELETE FROM {category} WHERE {pk_col} = ?", (item_id,))
+        if old_image:
+            release_image(conn, old_image['image_id'])
+
+    await db.write(delete)
+    invalidate_content(category, item_id)
     
     return RedirectResponse(url=f"/admin/{category}", status_code=303)
 
 
 @router.get("/admin/{category}/{item_id}/edit")
-async def admin_edit_category(request: Request, category: str, item_id: str, user = Depends(require_admin)):
+async def admin_edit_category(request: Request, category: str, item_id: str, user = Depends(require_admin), db = Depends(get_db)):
     allowed_categories = ['news', 'seminars', 'workshops', 'publications', 'members']
     if category not in allowed_categories:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    conn = get_db_connection()
     pk_col = "slug" if category == "news" else "id"
-    item = conn.execute(f"SELECT * FROM {category} WHERE {pk_col} = ?", (item_id,)).fetchone()
-    conn.close()
+    if category in IMAGE_TABLES:
+        item = await db.fetchone(f"SELECT t.*, i.hash AS image_hash, i.width AS image_width, i.height AS image_height FROM {category} t LEFT JOIN images i ON i.id = t.image_id WHERE t.{pk_col} = ?", (item_id,))
+    else:
+        item = await db.fetchone(f"SELECT * FROM {category} WHERE {pk_col} = ?", (item_id,))
 
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -1202,9 +1122,8 @@ async def admin_edit_category(request: Request, category: str, item_id: str, use
     return Response(f"Edit form for {category} not implemented yet.", status_code=501)
 
 @router.post("/admin/{category}/{item_id}/edit")
-async def admin_save_category(request: Request, category: str, item_id: str, user = Depends(require_admin)):
+async def admin_save_category(request: Request, category: str, item_id: str, user = Depends(require_admin), db = Depends(get_db)):
     form = await request.form()
-    conn = get_db_connection()
     
     approval_status = form.get("approval_status")
     
@@ -1216,11 +1135,13 @@ async def admin_save_category(request: Request, category: str, item_id: str, use
 
     # Handle Image Upload if present
     image = form.get("image")
-    image_data = None
-    image_mime = None
-    if image and hasattr(image, 'filename') and image.filename:
-        image_data = await image.read()
-        image_mime = image.content_type
+    upload = None
+    if category in IMAGE_TABLES and image and hasattr(image, 'filename') and image.filename:
+        upload = await prepare_image(db, await image.read(), image.content_type)
+
+    # Each branch prepares its UPDATE (without the WHERE clause); it runs in one write below
+    update_sql = None
+    values = ()
 
     if category == 'seminars':
         title = form.get("title")
@@ -1248,7 +1169,7 @@ async def admin_save_category(request: Request, category: str, item_id: str, use
             local_dt_str = f"{date} {time}"
             local_dt = datetime.strptime(local_dt_str, "%Y-%m-%d %H:%M")
             if timezone:
-                tz = pytz.timezone(timezone)
+                tz = get_timezone(timezone)
                 local_dt = tz.localize(local_dt)
                 utc_dt = local_dt.astimezone(pytz.UTC)
                 start_datetime_utc = utc_dt.isoformat()
@@ -1260,19 +1181,11 @@ async def admin_save_category(request: Request, category: str, item_id: str, use
         if recording_url is None:
             recording_url = ""
 
-        if image_data:
-            conn.execute("""
-                UPDATE seminars SET 
-                    title=?, speaker=?, affiliation=?, date=?, time=?, location=?, related_links=?, start_datetime_utc=?, recording_url=?, abstract=?, approval_status=?,
-                    image_data=?, image_mime=?
-                WHERE id=?
-            """, (title, speaker, affiliation, date, time, location, clean_links_json, start_datetime_utc, recording_url, abstract, status_json, image_data, image_mime, item_id))
-        else:
-            conn.execute("""
-                UPDATE seminars SET 
-                    title=?, speaker=?, affiliation=?, date=?, time=?, location=?, related_links=?, start_datetime_utc=?, recording_url=?, abstract=?, approval_status=?
-                WHERE id=?
-            """, (title, speaker, affiliation, date, time, location, clean_links_json, start_datetime_utc, recording_url, abstract, status_json, item_id))
+        update_sql = """
+            UPDATE seminars SET 
+                title=?, speaker=?, affiliation=?, date=?, sort_date=?, time=?, location=?, related_links=?, start_datetime_utc=?, recording_url=?, abstract=?, plain_text=?, summary=?, approval_status=?, status=?
+        """
+        values = (title, speaker, affiliation, date, normalize_date(date), time, location, clean_links_json, start_datetime_utc, recording_url, abstract, *summarize(abstract), status_json, approval_status)
         
     elif category == 'news':
         title = form.get("title")
@@ -1291,14 +1204,8 @@ async def admin_save_category(request: Request, category: str, item_id: str, use
                 except:
                     related_links = None
 
-        if image_data:
-            conn.execute("""
-                UPDATE news SET title=?, date=?, body=?, related_links=?, approval_status=?, image_data=?, image_mime=? WHERE slug=?
-            """, (title, date, body, related_links, status_json, image_data, image_mime, item_id))
-        else:
-             conn.execute("""
-                UPDATE news SET title=?, date=?, body=?, related_links=?, approval_status=? WHERE slug=?
-            """, (title, date, body, related_links, status_json, item_id))
+        update_sql = "UPDATE news SET title=?, date=?, sort_date=?, body=?, plain_text=?, summary=?, related_links=?, approval_status=?, status=?"
+        values = (title, date, normalize_date(date), body, *summarize(body), related_links, status_json, approval_status)
 
     elif category == 'workshops':
         title = form.get("title")
@@ -1317,19 +1224,11 @@ async def admin_save_category(request: Request, category: str, item_id: str, use
                 clean_links_json = json.dumps(clean_links)
             except: pass
 
-        if image_data:
-             conn.execute("""
-                UPDATE workshops SET 
-                    title=?, start_date=?, end_date=?, location=?, description=?, related_links=?, approval_status=?,
-                    image_data=?, image_mime=?
-                WHERE id=?
-            """, (title, start_date, end_date, location, description, clean_links_json, status_json, image_data, image_mime, item_id))
-        else:
-             conn.execute("""
-                UPDATE workshops SET 
-                    title=?, start_date=?, end_date=?, location=?, description=?, related_links=?, approval_status=?
-                WHERE id=?
-            """, (title, start_date, end_date, location, description, clean_links_json, status_json, item_id))
+        update_sql = """
+            UPDATE workshops SET 
+                title=?, start_date=?, sort_date=?, end_date=?, location=?, description=?, plain_text=?, summary=?, related_links=?, approval_status=?, status=?
+        """
+        values = (title, start_date, normalize_date(start_date), end_date, location, description, *summarize(description), clean_links_json, status_json, approval_status)
             
     elif category == 'publications':
         title = form.get("title")
@@ -1338,9 +1237,8 @@ async def admin_save_category(request: Request, category: str, item_id: str, use
         year = form.get("year")
         link = form.get("link")
         
-        conn.execute("""
-            UPDATE publications SET title=?, authors=?, description=?, year=?, link=?, approval_status=? WHERE id=?
-        """, (title, authors, description, year, link, status_json, item_id))
+        update_sql = "UPDATE publications SET title=?, authors=?, description=?, year=?, link=?, approval_status=?, status=?"
+        values = (title, authors, description, year, link, status_json, approval_status)
 
     elif category == 'members':
         name = form.get("name")
@@ -1361,17 +1259,25 @@ async def admin_save_category(request: Request, category: str, item_id: str, use
                 except:
                     links = None
         
-        if image_data:
-             conn.execute("""
-                UPDATE members SET name=?, affiliation=?, email=?, statement=?, education=?, links=?, approval_status=?, image_data=?, image_mime=? WHERE id=?
-            """, (name, affiliation, email, statement, education, links, status_json, image_data, image_mime, item_id))
-        else:
-             conn.execute("""
-                UPDATE members SET name=?, affiliation=?, email=?, statement=?, education=?, links=?, approval_status=? WHERE id=?
-            """, (name, affiliation, email, statement, education, links, status_json, item_id))
+        update_sql = "UPDATE members SET name=?, affiliation=?, email=?, statement=?, education=?, links=?, approval_status=?, status=?"
+        values = (name, affiliation, email, statement, education, links, status_json, approval_status)
+
+    pk_col = "slug" if category == "news" else "id"
 
-    conn.commit()
-    conn.close()
+    def save(conn):
+        if update_sql is None:
+            return
+        if not upload:
+            conn.execute(f"{update_sql} WHERE {pk_col}=?", (*values, item_id))
+            return
+        old_image = conn.execute(f"SELECT image_id FROM {category} WHERE {pk_col} = ?", (item_id,)).fetchone()
+        conn.execute(f"{update_sql}, image_id=? WHERE {pk_col}=?", (*values, store_image(conn, upload), item_id))
+        if old_image:
+            # The new upload may be the same image (dedupe); release_image keeps it while referenced
+            release_image(conn, old_image['image_id'])
+
+    await db.write(save)
+    invalidate_content(category, item_id)
     return RedirectResponse(url=f"/admin/{category}", status_code=303)
 
 @router.get("/admin/mailing/announcement")
@@ -1379,7 +1285,7 @@ async def mailing_announcement(request: Request, user = Depends(require_admin)):
     return templates.TemplateResponse("admin/mailing_announcement.html", {"request": request})
 
 @router.post("/admin/mailing/send")
-async def send_announcement(request: Request, user = Depends(require_admin)):
+async def send_announcement(request: Request, user = Depends(require_admin), db = Depends(get_db)):
     form = await request.form()
     subject = form.get("subject")
     body = form.get("body")
@@ -1387,14 +1293,12 @@ async def send_announcement(request: Request, user = Depends(require_admin)):
     
     from .mailing import send_email, send_bulk_email
     
-    conn = get_db_connection()
-    admin = conn.execute("SELECT email FROM admins WHERE username = ?", (user['username'],)).fetchone()
+    admin = await db.fetchone("SELECT email FROM admins WHERE username = ?", (user['username'],))
     
     # Check if admin has email (should be required now)
     admin_email = admin['email'] if admin and admin['email'] else None
     
     if not admin_email:
-        conn.close()
         return templates.TemplateResponse("admin/mailing_announcement.html", {
             "request": request, 
             "message": "Error: Your admin account does not have an email address configured.",
@@ -1404,7 +1308,6 @@ async def send_announcement(request: Request, user = Depends(require_admin)):
 
     if test_only:
         try:
-            conn.close()
             # Format with admin/dummy data for test
             dummy_context = {
                 "name": "Admin Test",
@@ -1430,8 +1333,7 @@ async def send_announcement(request: Request, user = Depends(require_admin)):
              message = f"Error sending test email: {e}"
     else:
         # Send to all contacts
-        contacts = conn.execute("SELECT name, email, affiliation FROM contacts").fetchall()
-        conn.close()
+        contacts = await db.fetchall("SELECT name, email, affiliation FROM contacts")
         
         recipients = [{"name": c["name"], "email": c["email"], "affiliation": c["affiliation"] or ""} for c in contacts]
         try:
@@ -1453,16 +1355,14 @@ async def mailing_json_form(request: Request, user = Depends(require_admin)):
      return templates.TemplateResponse("admin/mailing_json.html", {"request": request})
 
 @router.post("/admin/mailing/json")
-async def send_json_email(request: Request, user = Depends(require_admin)):
+async def send_json_email(request: Request, user = Depends(require_admin), db = Depends(get_db)):
     form = await request.form()
     json_str = form.get("json_data")
     test_only = form.get("test_only") == "on"
     
     from .mailing import send_email, send_bulk_email
     
-    conn = get_db_connection()
-    admin = conn.execute("SELECT email FROM admins WHERE username = ?", (user['username'],)).fetchone()
-    conn.close()
+    admin = await db.fetchone("SELECT email FROM admins WHERE username = ?", (user['username'],))
     
     admin_email = admin['email'] if admin and admin['email'] else None
     if not admin_email:
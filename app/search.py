@@ -0,0 +1,121 @@
+import re
+from markupsafe import Markup, escape
+
+# One FTS5 table indexes every content type. kind/key/url are stored but not searched;
+# title, people and body are the searchable columns (ranked in that order of weight).
+# Only approved rows are indexed; triggers on the content tables keep it in sync (app/migrations/0009_search_index.py,
+# keyed by rowid since app/migrations/0011_search_index_keys.py).
+SEARCH_TABLE = "search_index"
+SEARCH_COLUMNS = ["kind", "key", "url", "title", "people", "body"]
+SEARCH_WEIGHTS = (0, 0, 0, 10.0, 5.0, 1.0)  # bm25() weights, one per column
+SEARCH_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "kind UNINDEXED, key UNINDEXED, url UNINDEXED, title, people, body, "
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+# (kind, key) -> rowid of the row's entry in search_index. kind/key are UNINDEXED in the FTS table,
+# so a WHERE on them reads the whole index; the sync triggers look the rowid up here instead.
+SEARCH_KEYS_TABLE = "search_index_keys"
+SEARCH_KEYS_CREATE_SQL = (
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_KEYS_TABLE} ("
+    "doc INTEGER PRIMARY KEY, kind TEXT NOT NULL, key NOT NULL, UNIQUE (kind, key))"
+)
+
+# kind -> (table, key column, url expression, title, people, body); expressions use the trigger's row alias
+SEARCH_SOURCES = {
+    "News": ("news", "slug", "'/news/' || {r}.slug", "{r}.title", "''", "{r}.plain_text"),
+    "Seminar": ("seminars", "id", "'/activities/seminars/' || {r}.slug", "{r}.title",
+                "COALESCE({r}.speaker, '') || ' ' || COALESCE({r}.affiliation, '')", "{r}.plain_text"),
+    "Workshop": ("workshops", "id", "'/activities/workshops/' || {r}.slug", "{r}.title", "COALESCE({r}.location, '')", "{r}.plain_text"),
+    "Publication": ("publications", "id", "COALESCE(NULLIF({r}.link, ''), '/resources/publications')", "{r}.title",
+                    "COALESCE({r}.authors, '')", "COALESCE({r}.description, '')"),
+    "Member": ("members", "id", "'/members/' || {r}.slug", "{r}.name", "COALESCE({r}.affiliation, '')", "COALESCE({r}.statement, '')"),
+}
+
+# Markers for highlight()/snippet(): control characters never found in content, swapped for <mark>
+# after the text is HTML-escaped
+MARK_START, MARK_END = "\x02", "\x03"
+
+def _values(kind, row):
+    _, key, url, title, people, body = SEARCH_SOURCES[kind]
+    return ", ".join([f"'{kind}'", f"{row}.{key}"] + [expr.format(r=row) for expr in (url, title, people, body)])
+
+def search_sql(kind, row):
+    """
+    (delete, insert) lists of trigger statements that remove / re-add one row of kind; row is "new" or "old".
+    Entries are found by rowid through search_index_keys, never by scanning the index.
+    """
+    key = f"{row}.{SEARCH_SOURCES[kind][1]}"
+    doc = f"(SELECT doc FROM {SEARCH_KEYS_TABLE} WHERE kind = '{kind}' AND key = {key})"
+    indexed = f"WHERE {row}.status = 'approved' AND {key} IS NOT NULL"
+    delete = [
+        f"DELETE FROM {SEARCH_TABLE} WHERE rowid = {doc}",
+        f"DELETE FROM {SEARCH_KEYS_TABLE} WHERE kind = '{kind}' AND key = {key}",
+    ]
+    # The entry gets its rowid from FTS5 (last_insert_rowid() is that rowid while the trigger runs);
+    # inserting with an explicit rowid from a subquery is much slower
+    insert = [
+        f"INSERT INTO {SEARCH_TABLE} ({', '.join(SEARCH_COLUMNS)}) SELECT {_values(kind, row)} {indexed}",
+        f"INSERT INTO {SEARCH_KEYS_TABLE} (doc, kind, key) SELECT last_insert_rowid(), '{kind}', {key} {indexed}",
+    ]
+    return delete, insert
+
+def search_triggers(kind):
+    """(name, CREATE TRIGGER statement) for the insert/update/delete triggers that sync kind's table."""
+    table = SEARCH_SOURCES[kind][0]
+    delete_old, _ = search_sql(kind, "old")
+    delete_new, insert_new = search_sql(kind, "new")
+    triggers = []
+    # An insert first drops a leftover entry under the same key (e.g. INSERT OR REPLACE, which fires no delete trigger)
+    for event, body in [("insert", delete_new + insert_new), ("update", delete_old + insert_new), ("delete", delete_old)]:
+        name = f"{table}_search_{event}"
+        triggers.append((name, f"CREATE TRIGGER {name} AFTER {event.upper()} ON {table} BEGIN {'; '.join(body)}; END"))
+    return triggers
+
+def search_fill_sql(kind):
+    """Statements that index every approved row of kind (initial fill of the index), then record their keys."""
+    table, key = SEARCH_SOURCES[kind][:2]
+    return [
+        f"INSERT INTO {SEARCH_TABLE} ({', '.join(SEARCH_COLUMNS)}) SELECT {_values(kind, table)} FROM {table} "
+        f"WHERE status = 'approved' AND {key} IS NOT NULL",
+        # One pass over the new entries (kind is UNINDEXED); the triggers never do this
+        f"INSERT INTO {SEARCH_KEYS_TABLE} (doc, kind, key) SELECT rowid, kind, key FROM {SEARCH_TABLE} WHERE kind = '{kind}'",
+    ]
+
+def match_query(q):
+    """
+    FTS5 MATCH expression for free text typed by a visitor: each word becomes a quoted prefix term
+    ("immun"* matches immune, immunology), all words required. None when there is nothing to search.
+    """
+    words = re.findall(r"\w+", q or "")[:10]
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+def highlighted(text):
+    """Escapes FTS output and turns the match markers into <mark> tags."""
+    return Markup(str(escape(text or "")).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>"))
+
+async def search(db, q, limit, offset=0):
+    """
+    Ranked matches for q: a list of dicts (kind, url, title, people, snippet), best first.
+    Asks for limit + 1 rows so the caller can tell whether there is a next page.
+    """
+    expr = match_query(q)
+    if not expr:
+        return []
+    rows = await db.fetchall(
+        f"SELECT kind, url, highlight({SEARCH_TABLE}, 3, ?, ?) AS title, people, "
+        f"snippet({SEARCH_TABLE}, 5, ?, ?, '…', 24) AS snippet "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ? "
+        f"ORDER BY bm25({SEARCH_TABLE}, {', '.join(str(w) for w in SEARCH_WEIGHTS)}) LIMIT ? OFFSET ?",
+        (MARK_START, MARK_END, MARK_START, MARK_END, expr, limit + 1, offset)
+    )
+    return [{
+        "kind": r["kind"],
+        "url": r["url"],
+        "title": highlighted(r["title"]),
+        "people": r["people"].strip(),
+        "snippet": highlighted(r["snippet"]),
+    } for r in rows]
@@ -1,2 +1,32 @@
 // Main JS file
 console.log("Glimprint loaded");
+
+// Name suggestions: <input data-autocomplete="/names/autocomplete" list="some-datalist-id">
+// fills its datalist from the endpoint while the visitor types (debounced, stale responses ignored).
+document.querySelectorAll("input[data-autocomplete]").forEach(function (input) {
+    var list = document.getElementById(input.getAttribute("list"));
+    var timer = null;
+    var latest = 0;
+    if (!list) return;
+    input.addEventListener("input", function () {
+        clearTimeout(timer);
+        var q = input.value.trim();
+        if (q.length < 2) return;
+        timer = setTimeout(function () {
+            var request = ++latest;
+            fetch(input.dataset.autocomplete + "?q=" + encodeURIComponent(q))
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    if (request !== latest) return;
+                    list.innerHTML = "";
+                    data.results.forEach(function (person) {
+                        var option = document.createElement("option");
+                        option.value = person.name;
+                        option.label = person.kind + (person.detail ? " - " + person.detail : "");
+                        list.appendChild(option);
+                    });
+                })
+                .catch(function () {});
+        }, 150);
+    });
+});
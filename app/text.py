@@ -0,0 +1,59 @@
+from html.parser import HTMLParser
+
+# Content tables with stored plain_text/summary columns -> the HTML column they are extracted from
+TEXT_SOURCES = {"news": "body", "seminars": "abstract", "workshops": "description"}
+
+# Length of the stored summary (listings show this; the home page cuts it shorter)
+SUMMARY_LENGTH = 200
+
+# Tags that end a line of text; everything else is inline
+BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "table", "blockquote", "pre", "section", "article", "hr"}
+SKIP_TAGS = {"script", "style", "head", "title", "template"}
+
+class TextExtractor(HTMLParser):
+    """Streaming HTML -> text: entities decoded, script/style dropped, block tags become line breaks."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip = max(0, self.skip - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.parts.append(data)
+
+    def text(self):
+        # Collapse runs of whitespace inside lines, drop empty lines
+        lines = (" ".join(line.split()) for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+def html_to_text(html):
+    """Plain text of an HTML fragment (also fine for plain text input)."""
+    if not html:
+        return ""
+    parser = TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+def truncate(text, length):
+    """First length characters of text, with "..." when something was cut."""
+    if not text:
+        return ""
+    return text[:length] + "..." if len(text) > length else text
+
+def summarize(html):
+    """(plain_text, summary) to store next to an HTML body."""
+    plain_text = html_to_text(html)
+    return plain_text, truncate(" ".join(plain_text.split()), SUMMARY_LENGTH)
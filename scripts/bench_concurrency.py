@@ -0,0 +1,153 @@
+"""
+Concurrency benchmark for the async database layer.
+
+Fires a stream of fast page requests (/news/<slug>) at the app in-process and reports
+their latency percentiles in three scenarios:
+  1. idle            - nothing else running
+  2. slow (async)    - a slow query running through the async DB layer at the same time
+  3. slow (blocking) - the same slow query run directly on the event loop (the old behaviour)
+
+With the async layer, p99 in scenario 2 should stay close to scenario 1,
+while scenario 3 shows every request stalling behind the slow query.
+
+Usage: python scripts/bench_concurrency.py [--requests 200] [--concurrency 10] [--slow-rows 1000000]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+# Never benchmark against the production database
+os.environ["TURSO_DATABASE_URL"] = ""
+os.environ["TURSO_AUTH_TOKEN"] = ""
+# Measure the database layer, not the page cache
+os.environ["PAGE_CACHE_MAX_BYTES"] = "0"
+
+from fastapi import Depends
+import app.database as database
+from app.database import get_db
+
+
+def build_db(path, rows=200):
+    # Current schema, as created by scripts/update_schema.py
+    sys.path.append(str(BASE_DIR / "scripts"))
+    import update_schema
+    update_schema.DB_PATH = Path(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        update_schema.update_schema()
+
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT OR REPLACE INTO news (slug, title, date, body, approval_status, status) VALUES (?, ?, ?, ?, ?, 'approved')",
+        [(f"bench-{i}", f"Bench news {i}", "2024-01-01", "<p>Benchmark body</p>" * 20, '{"status": "approved"}') for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+async def asgi_get(app, path):
+    """Minimal in-process ASGI GET, so the benchmark needs no HTTP client library."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+async def fast_load(app, n_requests, concurrency):
+    latencies = []
+    counter = iter(range(n_requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            status = await asgi_get(app, f"/news/bench-{i % 200}")
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                raise RuntimeError(f"Unexpected status {status}")
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies
+
+
+async def scenario(app, name, slow_path, args):
+    async def slow_query():
+        await asyncio.sleep(0.02)  # start once the fast requests are in flight
+        await asgi_get(app, slow_path)
+
+    tasks = [fast_load(app, args.requests, args.concurrency)]
+    if slow_path:
+        tasks.append(slow_query())
+    latencies = (await asyncio.gather(*tasks))[0]
+    print(f"{name:<16} p50={statistics.median(latencies):7.2f} ms  p99={percentile(latencies, 99):7.2f} ms  max={max(latencies):7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request latency while a slow query runs.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--slow-rows", type=int, default=1000000, help="Size of the recursive CTE used as the slow query")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="glimprint-bench-")
+    database.DB_PATH = Path(tmp_dir) / "bench.db"
+    build_db(database.DB_PATH)
+
+    from app.main import app
+
+    slow_sql = f"WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < {args.slow_rows}) SELECT count(*) FROM c"
+
+    @app.get("/__bench/slow")
+    async def bench_slow(db = Depends(get_db)):
+        return {"n": (await db.fetchone(slow_sql))[0]}
+
+    @app.get("/__bench/slow-blocking")
+    async def bench_slow_blocking(db = Depends(get_db)):
+        # Deliberately bypasses the async layer to show the old behaviour
+        return {"n": (await db.acquire()).execute(slow_sql).fetchone()[0]}
+
+    async def run():
+        await asgi_get(app, "/news/bench-0")  # warm up pool and templates
+        start = time.perf_counter()
+        await asgi_get(app, "/__bench/slow")
+        print(f"Slow query alone takes {(time.perf_counter() - start) * 1000:.0f} ms")
+        print(f"{args.requests} requests to /news/<slug>, concurrency {args.concurrency}:")
+        await scenario(app, "idle", None, args)
+        await scenario(app, "slow (async)", "/__bench/slow", args)
+        await scenario(app, "slow (blocking)", "/__bench/slow-blocking", args)
+
+    asyncio.run(run())
+    database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
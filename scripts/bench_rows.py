@@ -0,0 +1,114 @@
+"""
+Microbenchmark for row materialization on a wide 10k-row result set (SELECT * from a news-like table).
+
+Compares:
+  - sqlite3.Row              (local SQLite backend)
+  - dict per row             (the previous LibSQLCursorWrapper: walks cursor.description for every row)
+  - app.database.Row         (current LibSQLCursorWrapper: column map built once per result set)
+
+Each is timed for fetchall() alone, and for fetchall() + the access patterns the routes use
+(dict(row) and row['col']).
+
+Usage: python scripts/bench_rows.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import libsql
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from app.database import LibSQLConnectionWrapper
+
+COLUMNS = ["slug", "title", "date", "image_mime", "body", "related_links", "approval_status", "created_at",
+           "summary", "location", "speaker", "affiliation", "abstract", "start_datetime_utc", "recording_url"]
+
+
+def build_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE wide ({', '.join(c + ' TEXT' for c in COLUMNS)})")
+    conn.executemany(
+        f"INSERT INTO wide VALUES ({', '.join('?' * len(COLUMNS))})",
+        [tuple(f"{c}-{i}" for c in COLUMNS) for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_dict_factory(cursor, row):
+    # The previous per-row conversion, kept here as the baseline
+    d = {}
+    for idx, col in enumerate(cursor.description):
+        d[col[0]] = row[idx]
+    return d
+
+
+class LegacyCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, sql, params=()):
+        self.cursor.execute(sql, params)
+        return self
+
+    def fetchall(self):
+        return [legacy_dict_factory(self.cursor, row) for row in self.cursor.fetchall()]
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def consume(rows):
+    # What the routes do with rows: copy to dict and read a few columns
+    for r in rows:
+        d = dict(r)
+        _ = r["slug"], r["title"], d["date"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare row materialization strategies.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="glimprint-bench-"), "rows.db")
+    build_db(path, args.rows)
+    sql = "SELECT * FROM wide"
+
+    sqlite_conn = sqlite3.connect(path)
+    sqlite_conn.row_factory = sqlite3.Row
+    libsql_raw = libsql.connect(path)
+    wrapped = LibSQLConnectionWrapper(libsql.connect(path))
+
+    cases = {
+        "sqlite3.Row": lambda: sqlite_conn.execute(sql).fetchall(),
+        "dict per row (old)": lambda: LegacyCursor(libsql_raw.cursor()).execute(sql).fetchall(),
+        "Row (current)": lambda: wrapped.execute(sql).fetchall(),
+    }
+
+    print(f"{args.rows} rows x {len(COLUMNS)} columns, best of {args.repeat}")
+    print(f"{'':<22}{'fetchall':>12}{'fetch+use':>12}")
+    for name, fetch in cases.items():
+        fetch_ms = best_of(args.repeat, fetch)
+        use_ms = best_of(args.repeat, lambda: consume(fetch()))
+        print(f"{name:<22}{fetch_ms:>10.1f}ms{use_ms:>10.1f}ms")
+
+    sqlite_conn.close()
+    libsql_raw.close()
+    wrapped.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark of the local SQLite storage profiles (SQLITE_PROFILES in app/database.py).
+
+For each profile, builds the same synthetic database (current schema plus --rows news items with
+HTML bodies), opens connections through the app's connection factory with the profile applied, and runs:
+  1. reads  - reader threads doing what page views do (listing page, detail by slug) for --seconds
+  2. mixed  - the same readers while writer threads insert submissions (INSERT + commit)
+Reports read throughput (queries/s) for both, and commit latency percentiles plus the number of
+"database is locked" errors for the writers.
+
+Usage: python scripts/bench_sqlite_profiles.py [--rows 20000] [--readers 4] [--writers 2] [--seconds 3]
+                                               [--profiles default,wal,tuned]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "scripts"))
+
+# Never benchmark against the production database
+os.environ["TURSO_DATABASE_URL"] = ""
+os.environ["TURSO_AUTH_TOKEN"] = ""
+os.environ["DB_REPLICA_PATH"] = ""
+
+import app.database as database
+import update_schema
+from app.text import summarize
+
+
+def build_db(path, rows):
+    update_schema.DB_PATH = Path(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        update_schema.update_schema()
+    conn = sqlite3.connect(path)
+    body = "<p>Synthetic benchmark body about immune models and their predictions.</p>" * 30
+    plain_text, summary = summarize(body)
+    conn.executemany(
+        "INSERT INTO news (slug, title, date, sort_date, body, plain_text, summary, approval_status, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'approved')",
+        [(f"bench-{i}", f"Bench news {i}", f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+          body, plain_text, summary, '{"status": "approved"}') for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def reader(conn, rows, stop, counts):
+    n = 0
+    rng = random.Random()
+    while not stop.is_set():
+        # A listing page (newest 20 approved) and a detail page, like a visitor clicking through
+        conn.execute(
+            "SELECT slug, title, date, summary FROM news WHERE status = 'approved' ORDER BY COALESCE(sort_date, '') DESC, slug DESC LIMIT 20"
+        ).fetchall()
+        conn.execute("SELECT * FROM news WHERE slug = ?", (f"bench-{rng.randrange(rows)}",)).fetchone()
+        n += 2
+    counts.append(n)
+
+
+def writer(conn, worker, stop, latencies, errors):
+    i = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn.execute(
+                "INSERT INTO news (slug, title, date, body, approval_status, status) VALUES (?, ?, ?, ?, ?, 'pending_approval')",
+                (f"submitted-{worker}-{i}", "Submitted news", "2024-06-01", "<p>Submitted body</p>" * 20, '{"status": "pending_approval"}')
+            )
+            conn.commit()
+            latencies.append((time.perf_counter() - start) * 1000)
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            errors.append(str(e))
+        i += 1
+        time.sleep(0.005)  # submissions arrive spaced out, not back to back
+
+
+def run_phase(connections, rows, readers, writers, seconds):
+    stop = threading.Event()
+    counts, latencies, errors = [], [], []
+    threads = [threading.Thread(target=reader, args=(connections[i], rows, stop, counts)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(connections[readers + w], w, stop, latencies, errors)) for w in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(counts) / seconds, latencies, errors
+
+
+def bench_profile(name, args, tmp_dir):
+    path = Path(tmp_dir) / f"{name}-{time.monotonic_ns()}.db"
+    build_db(path, args.rows)
+    database.DB_PATH = path
+    database.SQLITE_PRAGMAS = database.sqlite_pragmas(name, "")
+    # Connections come from the same factory the pool uses, so the profile is applied the same way
+    connections = [database._connect_primary() for _ in range(args.readers + args.writers)]
+    try:
+        journal = connections[0].execute("PRAGMA journal_mode").fetchone()[0]
+        read_qps, _, _ = run_phase(connections, args.rows, args.readers, 0, args.seconds)
+        mixed_qps, latencies, errors = run_phase(connections, args.rows, args.readers, args.writers, args.seconds)
+    finally:
+        for conn in connections:
+            conn.close()
+
+    print(f"\n{name} ({journal}): {database.SQLITE_PRAGMAS or 'library defaults'}")
+    print(f"  reads only      {read_qps:10.0f} queries/s")
+    print(f"  reads + writes  {mixed_qps:10.0f} queries/s")
+    if latencies:
+        print(f"  commit latency  p50={statistics.median(latencies):7.2f} ms  p99={percentile(latencies, 99):7.2f} ms  ({len(latencies)} commits)")
+    print(f"  locked errors   {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SQLite storage profiles: read throughput and write latency.")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--profiles", default=",".join(database.SQLITE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.rows} news rows, {args.readers} readers, {args.writers} writers, {args.seconds:g} s per phase")
+    with tempfile.TemporaryDirectory(prefix="glimprint-bench-") as tmp_dir:
+        for name in args.profiles.split(","):
+            bench_profile(name.strip(), args, tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
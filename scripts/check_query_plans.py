@@ -0,0 +1,272 @@
+"""
+Query plan check: every SQL statement the routes issue must be served by an index.
+
+Crawls the public pages (listings and their second pages, detail pages, images, search, autocomplete)
+and the admin pages (dashboard, lists, edit forms, approve and delete) in-process, records each
+statement the app executes, and runs EXPLAIN QUERY PLAN on it. A plan step that scans a whole table
+without an index ("SCAN news" rather than "SEARCH news USING INDEX ..." or "SCAN news USING INDEX ...")
+is reported and the script exits with status 1; ALLOWED_SCANS lists the statements that read a whole
+table on purpose. Sorts that need a temporary b-tree are reported as warnings.
+
+Trigger bodies do not show up in the trace, so the statements of the search index sync triggers
+(app/search.py) are checked as well, with the trigger's old/new values replaced by NULL. A virtual
+table step without a constraint ("SCAN search_index VIRTUAL TABLE INDEX 0:") counts as a full scan.
+
+Everything runs against a throwaway copy of the local database with scripts/update_schema.py applied,
+so the check covers the indexes the migration creates. Turso is never contacted and no email is sent
+(the mailing routes are not crawled).
+
+Usage:
+  python scripts/check_query_plans.py [--db db/glimprint.db] [--verbose]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from urllib.parse import urlencode
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "scripts"))
+
+# Local copy only: these win over .env (load_dotenv does not override variables that are set)
+os.environ["TURSO_DATABASE_URL"] = ""
+os.environ["TURSO_AUTH_TOKEN"] = ""
+os.environ["DB_REPLICA_PATH"] = ""
+
+import update_schema
+from app import database
+from app.auth import get_password_hash
+from app.main import app
+from app.search import SEARCH_SOURCES, search_sql
+
+CONTENT_TABLES = ["news", "seminars", "workshops", "publications", "members"]
+
+# Statements that read every row by design: (pattern on the normalized SQL, reason)
+ALLOWED_SCANS = []
+
+CHECK_USER = "query-plan-check"
+CHECK_PASSWORD = "query-plan-check"
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+NEXT_LINK = re.compile(r'<link rel="next" href="([^"]+)"')
+
+recorded = {}  # normalized SQL -> (example SQL with values, first path that issued it)
+current_path = None
+
+
+def normalize(sql):
+    """Statement with literal values replaced by ?, so one query shape is checked once."""
+    return " ".join(LITERALS.sub("?", sql).split())
+
+
+def record(sql):
+    sql = sql.strip()
+    if not re.match(r"(SELECT|WITH|UPDATE|DELETE|INSERT)\b", sql, re.IGNORECASE):
+        return  # BEGIN/COMMIT, trigger bodies ("-- TRIGGER ...")
+    recorded.setdefault(normalize(sql), (sql, current_path))
+
+
+def traced(connect):
+    """Wraps the pool's connection factory so every statement run on a new connection is recorded."""
+    def wrapper():
+        conn = connect()
+        conn.set_trace_callback(record)
+        return conn
+    return wrapper
+
+
+class Client:
+    """Minimal in-process HTTP client (like export_static.asgi_get) that keeps the session cookie."""
+    def __init__(self):
+        self.cookies = {}
+
+    async def request(self, method, path, form=None):
+        global current_path
+        current_path = f"{method} {path}"
+        path, _, query = path.partition("?")
+        body = urlencode(form or {}).encode()
+        headers = [(b"host", b"check")]
+        if form is not None:
+            headers.append((b"content-type", b"application/x-www-form-urlencoded"))
+        if self.cookies:
+            headers.append((b"cookie", "; ".join(f"{k}={v}" for k, v in self.cookies.items()).encode()))
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": query.encode(), "root_path": "", "headers": headers,
+            "client": ("127.0.0.1", 0), "server": ("check", 80),
+        }
+        status, chunks = None, []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for k, v in message.get("headers", []):
+                    if k.lower() == b"set-cookie":
+                        name, _, value = v.decode().split(";")[0].partition("=")
+                        self.cookies[name] = value
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await app(scope, receive, send)
+        return status, b"".join(chunks).decode("utf-8", "replace")
+
+    async def get(self, path):
+        return await self.request("GET", path)
+
+    async def post(self, path, form=None):
+        return await self.request("POST", path, form or {})
+
+
+def samples(conn):
+    """One approved row (and one image) per table to request detail pages for."""
+    found = {}
+    for t in CONTENT_TABLES:
+        pk = "slug" if t == "news" else "id"
+        columns = f"{pk} AS pk, slug" + (", image_id" if t in ("news", "seminars", "workshops", "members") else ", NULL AS image_id")
+        found[t] = conn.execute(f"SELECT {columns} FROM {t} WHERE status = 'approved' ORDER BY image_id IS NULL LIMIT 1").fetchone()
+    found["image"] = conn.execute("SELECT hash FROM images WHERE hash IS NOT NULL LIMIT 1").fetchone()
+    found["variant"] = conn.execute("SELECT i.hash, v.variant FROM image_variants v JOIN images i ON i.id = v.image_id LIMIT 1").fetchone()
+    found["member"] = conn.execute("SELECT name FROM members WHERE status = 'approved' AND name != '' LIMIT 1").fetchone()
+    found["title"] = conn.execute("SELECT title FROM news WHERE status = 'approved' LIMIT 1").fetchone()
+    return found
+
+
+async def crawl(client, found):
+    listings = ["/", "/news", "/activities/seminars", "/activities/workshops", "/resources/publications", "/members"]
+    for path in listings:
+        status, html = await client.get(path)
+        next_page = NEXT_LINK.search(html)
+        if next_page:
+            await client.get(next_page.group(1).replace("&amp;", "&"))
+    await client.get("/activities/upcoming")
+
+    details = {"news": "/news/", "seminars": "/activities/seminars/", "workshops": "/activities/workshops/", "members": "/members/"}
+    image_redirects = {"news": "/news/image/", "seminars": "/seminars/image/", "workshops": "/workshops/image/", "members": "/members/image/"}
+    for t, prefix in details.items():
+        row = found[t]
+        if row and row["slug"]:
+            await client.get(prefix + row["slug"])
+            await client.get(image_redirects[t] + row["slug"])
+    if found["image"]:
+        await client.get(f"/images/{found['image']['hash']}")
+    if found["variant"]:
+        await client.get(f"/images/{found['variant']['hash']}/{found['variant']['variant']}")
+
+    if found["title"]:
+        word = (re.findall(r"\w{4,}", found["title"]["title"]) or ["model"])[0]
+        await client.get(f"/search?{urlencode({'q': word})}")
+        await client.get(f"/search?{urlencode({'q': word, 'page': 2})}")
+    if found["member"]:
+        await client.get(f"/names/autocomplete?{urlencode({'q': found['member']['name'][:4]})}")
+
+    # Admin: log in with a user created in the copy
+    status, _ = await client.post("/admin/login", {"username": CHECK_USER, "password": CHECK_PASSWORD})
+    if status != 303:
+        print(f"  ! admin login failed ({status}), admin routes not checked")
+        return
+    for path in ["/admin", "/admin/approvals", "/admin/contacts"]:
+        await client.get(path)
+    await client.get(f"/names/autocomplete?{urlencode({'q': 'smith'})}")
+    for t in CONTENT_TABLES:
+        await client.get(f"/admin/{t}")
+        row = found[t]
+        if row is None:
+            continue
+        await client.get(f"/admin/{t}/{row['pk']}/edit")
+        await client.post(f"/admin/{t}/{row['pk']}/approve")
+        if row["slug"]:
+            await client.post(f"/admin/approve/{t}/{row['slug']}")
+        await client.post(f"/admin/{t}/{row['pk']}/delete")
+
+
+def record_triggers():
+    """The search index sync trigger statements, which the trace does not report (they run inside the write)."""
+    global current_path
+    for kind, (table, *_) in SEARCH_SOURCES.items():
+        current_path = f"trigger {table}_search_*"
+        for row in ("old", "new"):
+            delete, insert = search_sql(kind, row)
+            for sql in delete + insert:
+                record(re.sub(rf"\b{row}\.(\w+)", "NULL", sql))
+
+
+def problems(conn, sql):
+    """(scans, sorts): plan steps that read a whole table without an index / sort in a temp b-tree."""
+    scans, sorts = [], []
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+        detail = row[3]
+        if (re.match(r"SCAN \w+$", detail) and detail != "SCAN CONSTANT ROW") or re.match(r"SCAN \w+ VIRTUAL TABLE INDEX \d+:$", detail):
+            scans.append(detail)
+        elif detail.startswith("USE TEMP B-TREE"):
+            sorts.append(detail)
+    return scans, sorts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a route query scans a table without an index")
+    parser.add_argument("--db", default=str(update_schema.DB_PATH), help="SQLite database to copy and check")
+    parser.add_argument("--verbose", action="store_true", help="print the plan of every statement")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"ERROR: database not found at {args.db}")
+        sys.exit(2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / "check.db"
+        shutil.copyfile(args.db, copy)
+
+        update_schema.DB_PATH = copy
+        with contextlib.redirect_stdout(io.StringIO()):
+            update_schema.update_schema()
+
+        conn = sqlite3.connect(copy)
+        conn.row_factory = sqlite3.Row
+        conn.execute("DELETE FROM admins WHERE username = ?", (CHECK_USER,))
+        conn.execute("INSERT INTO admins (username, password_hash) VALUES (?, ?)", (CHECK_USER, get_password_hash(CHECK_PASSWORD)))
+        conn.commit()
+        found = samples(conn)
+
+        database.DB_PATH = copy
+        database._connect_primary = traced(database._connect_primary)
+        asyncio.run(crawl(Client(), found))
+        record_triggers()
+        database.close_write_queue()
+        database.close_pool()
+
+        failures = 0
+        print(f"Checked {len(recorded)} distinct statements")
+        for shape, (sql, path) in sorted(recorded.items(), key=lambda item: item[1][1]):
+            scans, sorts = problems(conn, sql)
+            allowed = next((reason for pattern, reason in ALLOWED_SCANS if re.search(pattern, shape)), None)
+            if scans and not allowed:
+                failures += 1
+                print(f"\nFULL SCAN ({path}): {', '.join(scans)}\n  {shape}")
+            elif sorts:
+                print(f"\nsort ({path}): {', '.join(sorts)}\n  {shape}")
+            elif args.verbose:
+                plan = "; ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+                print(f"\nok ({path}): {plan}\n  {shape}")
+        conn.close()
+
+    if failures:
+        print(f"\n{failures} statement(s) scan a table without an index")
+        sys.exit(1)
+    print("\nAll statements use indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Static export of the public site, for serving from a CDN in front of the FastAPI app.
+
+Renders every public page (listings, static pages and every approved news/seminar/workshop/member
+detail page) plus every image and image variant those pages reference into an output directory.
+Submissions and admin routes are not exported; they stay on FastAPI.
+
+Pages are written as <path>/index.html (JSON endpoints as <path>.json). Paginated listings are
+followed through their "Next page" links: page n is written as <listing>/page/<n>/index.html, and
+the ?after=<cursor> links in the exported HTML are rewritten to point there. Images are written as
+images/<hash>[-<variant>].<ext>. Their URLs (and those of the JSON pages) have no extension, so
+manifest.json lists a rewrite (URL -> file) for each of them, in the same shape as the "rewrites"
+entries of vercel.json. The manifest also records the cache tags of each page (the same tags the
+in-process page cache uses, e.g. "news:list", "news:<slug>").
+
+Incremental regeneration: --changed <table>:<slug or id> re-renders only the pages tagged with that
+item or with its table's listings (the home page counts as a news/seminar/workshop listing),
+exports any new images, and removes the detail page of an item that was deleted or unapproved.
+
+The pages are rendered in-process against the configured database (Turso if TURSO_DATABASE_URL is set).
+
+Usage:
+  python scripts/export_static.py [--out dist]
+  python scripts/export_static.py --out dist --changed news:my-news-slug seminars:12
+"""
+import argparse
+import asyncio
+import html
+import json
+import re
+import shutil
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from dotenv import load_dotenv
+load_dotenv(dotenv_path=BASE_DIR / ".env")
+
+from app.main import app
+from app.database import get_db_connection, close_pool
+
+# Public pages without parameters: path -> cache tags
+STATIC_PAGES = {
+    "/": ["news:list", "seminars:list", "workshops:list"],
+    "/news": ["news:list"],
+    "/activities/seminars": ["seminars:list"],
+    "/activities/workshops": ["workshops:list"],
+    "/activities/upcoming": ["seminars:list", "workshops:list"],
+    "/members": ["members:list"],
+    "/resources/publications": ["publications:list"],
+    "/about": ["static"],
+    "/about/history": ["static"],
+    "/about/submit-news": ["static"],
+    "/about/contact": ["static"],
+    "/membership": ["static"],
+    "/resources/runnable-model": ["static"],
+    "/basic-viral-sir-model-lorenzo-felletti": ["static"],
+}
+
+# Detail pages: table -> URL prefix (the slug is appended)
+DETAIL_PAGES = {
+    "news": "/news/",
+    "seminars": "/activities/seminars/",
+    "workshops": "/activities/workshops/",
+    "members": "/members/",
+}
+
+IMAGE_URL = re.compile(r"/images/[0-9a-f]{64}(?:/[a-z]+)?")
+NEXT_LINK = re.compile(rb'<link rel="next" href="([^"]+)"')
+
+EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/gif": "gif", "image/webp": "webp", "image/avif": "avif", "image/svg+xml": "svg"}
+
+
+async def asgi_get(path):
+    """In-process GET against the app. Returns (status, headers, body)."""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "https", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "", "headers": [(b"host", b"export")],
+        "client": ("127.0.0.1", 0), "server": ("export", 443),
+    }
+    status, headers, body = None, {}, []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            headers = {k.decode().lower(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, headers, b"".join(body)
+
+
+def approved_slugs(table, key=None):
+    """Slugs of approved rows in table (optionally only the row whose slug or id is key)."""
+    conn = get_db_connection()
+    try:
+        if key is None:
+            rows = conn.execute(f"SELECT slug FROM {table} WHERE status = 'approved' AND slug IS NOT NULL").fetchall()
+        elif table == "news":
+            rows = conn.execute("SELECT slug FROM news WHERE status = 'approved' AND slug = ?", (key,)).fetchall()
+        else:
+            rows = conn.execute(f"SELECT slug FROM {table} WHERE status = 'approved' AND (slug = ? OR id = ?)", (key, key)).fetchall()
+        return [r["slug"] for r in rows]
+    finally:
+        conn.close()
+
+
+def page_file(path, content_type="text/html"):
+    # JSON endpoints (e.g. /activities/upcoming) are written as <path>.json, with a rewrite in the manifest
+    if content_type.startswith("application/json"):
+        return Path(path.strip("/") + ".json")
+    return Path(path.strip("/")) / "index.html"
+
+
+def listing_page_path(path, n):
+    """Static path of page n (2, 3, ...) of a paginated listing: /news -> /news/page/2."""
+    return f"{path.rstrip('/')}/page/{n}"
+
+
+def image_file(url, content_type):
+    parts = url.strip("/").split("/")  # images/<hash>[/<variant>]
+    name = parts[1] + (f"-{parts[2]}" if len(parts) > 2 else "")
+    return Path("images") / f"{name}.{EXTENSIONS.get(content_type.split(';')[0], 'bin')}"
+
+
+async def export_pages(out, pages, manifest):
+    """
+    Renders pages ({path: tags}) into out. Returns the image URLs they reference.
+    A page whose tags are None (item deleted or not approved) is removed instead.
+    """
+    images = set()
+    for path, tags in pages.items():
+        status, headers, body = await asgi_get(path) if tags is not None else (None, None, None)
+        if status != 200:
+            # Deleted or no longer approved: drop the stale copy (and the further pages of a listing)
+            print(f"  {status or '-'} {path} (removed)")
+            remove_page(out, manifest, path)
+            remove_listing_pages(out, manifest, path, after=1)
+            continue
+        # Paginated listings: follow the next links, writing page 2, 3, ... as static pages
+        n = 1
+        while True:
+            next_link = NEXT_LINK.search(body)
+            if next_link:
+                body = body.replace(next_link.group(1), listing_page_path(path, n + 1).encode())
+            page_path = path if n == 1 else listing_page_path(path, n)
+            target = page_file(page_path, headers.get("content-type", ""))
+            (out / target).parent.mkdir(parents=True, exist_ok=True)
+            (out / target).write_bytes(body)
+            manifest["pages"][page_path] = {"file": str(target), "tags": tags}
+            if n > 1:
+                manifest["pages"][page_path]["listing"] = path
+            images.update(IMAGE_URL.findall(body.decode("utf-8", "replace")))
+            print(f"  {status} {page_path}")
+            if not next_link:
+                break
+            n += 1
+            status, headers, body = await asgi_get(html.unescape(next_link.group(1).decode()))
+            if status != 200:
+                print(f"  {status} {path} page {n} (stopped)")
+                n -= 1
+                break
+        # The listing may have shrunk since the last export
+        remove_listing_pages(out, manifest, path, after=n)
+    return images
+
+
+def remove_page(out, manifest, path):
+    target = out / (manifest["pages"].pop(path, None) or {"file": str(page_file(path))})["file"]
+    if target.exists():
+        target.unlink()
+        if path != "/" and not any(target.parent.iterdir()):
+            target.parent.rmdir()
+
+
+def remove_listing_pages(out, manifest, listing, after):
+    """Removes the exported pages of listing beyond page number after."""
+    for path, entry in list(manifest["pages"].items()):
+        if entry.get("listing") == listing and int(path.rsplit("/", 1)[1]) > after:
+            remove_page(out, manifest, path)
+            print(f"  removed {path}")
+
+
+async def export_images(out, urls, manifest):
+    # Image URLs are content-addressed: a file that is already exported never changes
+    for url in sorted(urls):
+        if url in manifest["images"] and (out / manifest["images"][url]["file"]).exists():
+            continue
+        status, headers, body = await asgi_get(url)
+        if status != 200:
+            print(f"  {status} {url} (skipped)")
+            continue
+        target = image_file(url, headers.get("content-type", ""))
+        (out / target).parent.mkdir(parents=True, exist_ok=True)
+        (out / target).write_bytes(body)
+        manifest["images"][url] = {"file": str(target), "content_type": headers.get("content-type")}
+        print(f"  {status} {url}")
+
+
+def write_manifest(out, manifest):
+    manifest["rewrites"] = [{"source": path, "destination": "/" + entry["file"]} for path, entry in sorted(manifest["pages"].items())
+                            if not entry["file"].endswith("index.html")]
+    manifest["rewrites"] += [{"source": url, "destination": "/" + entry["file"]} for url, entry in sorted(manifest["images"].items())]
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+
+def affected_pages(manifest, changed):
+    """Pages to re-render for --changed items: everything tagged with the item or its table's listings."""
+    pages = {}
+    for item in changed:
+        table, _, key = item.partition(":")
+        if table not in DETAIL_PAGES and table != "publications":
+            raise SystemExit(f"Unknown table in --changed {item}")
+        tags = {f"{table}:list", item}
+        for path, tag_list in STATIC_PAGES.items():
+            if tags & set(tag_list):
+                pages[path] = tag_list
+        for path, entry in manifest["pages"].items():
+            # Further pages of a listing are re-exported with the listing itself
+            if tags & set(entry["tags"]) and "listing" not in entry:
+                pages[path] = entry["tags"]
+        if table in DETAIL_PAGES and key:
+            # The item's own page (new, edited or re-approved), under its slug.
+            # Detail routes also render pending items, so an unapproved or deleted one is removed instead.
+            slugs = approved_slugs(table, key)
+            for slug in slugs:
+                pages[DETAIL_PAGES[table] + slug] = [f"{table}:{slug}"]
+            if not slugs:
+                pages[DETAIL_PAGES[table] + key] = None
+    return pages
+
+
+async def run(args):
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest_path = out / "manifest.json"
+    old = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    manifest = {"pages": old.get("pages", {}), "images": old.get("images", {})}
+
+    if args.changed:
+        pages = affected_pages(manifest, args.changed)
+        print(f"Regenerating {len(pages)} pages for {', '.join(args.changed)}")
+    else:
+        pages = dict(STATIC_PAGES)
+        for table, prefix in DETAIL_PAGES.items():
+            for slug in approved_slugs(table):
+                pages[prefix + slug] = [f"{table}:{slug}"]
+        # Pages from the previous export that no longer exist get removed below
+        # (further pages of a listing are kept or removed when the listing is exported)
+        for path in set(manifest["pages"]) - set(pages):
+            if manifest["pages"][path].get("listing") in pages:
+                continue
+            stale = out / manifest["pages"].pop(path)["file"]
+            if stale.exists():
+                stale.unlink()
+            print(f"  removed {path}")
+        print(f"Exporting {len(pages)} pages to {out}")
+        # Assets referenced by the templates
+        shutil.copytree(BASE_DIR / "app" / "static", out / "static", dirs_exist_ok=True)
+
+    images = await export_pages(out, pages, manifest)
+    await export_images(out, images, manifest)
+    write_manifest(out, manifest)
+    print(f"Done: {len(manifest['pages'])} pages, {len(manifest['images'])} images in {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the public site as static files.")
+    parser.add_argument("--out", default=str(BASE_DIR / "dist"), help="Output directory (default: dist/)")
+    parser.add_argument("--changed", nargs="+", metavar="TABLE:KEY",
+                        help="Only regenerate pages affected by these items, e.g. news:<slug> seminars:<slug or id>")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
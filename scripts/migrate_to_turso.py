@@ -1,4 +1,5 @@
 import os
+import sys
 import sqlite3
 import libsql
 from pathlib import Path
@@ -11,6 +12,9 @@ load_dotenv(dotenv_path=ENV_PATH)
 
 DB_PATH = BASE_DIR / "db" / "glimprint.db"
 
+sys.path.append(str(BASE_DIR))
+from app.search import SEARCH_TABLE, SEARCH_CREATE_SQL, SEARCH_KEYS_TABLE, SEARCH_KEYS_CREATE_SQL, SEARCH_SOURCES, search_triggers, search_fill_sql
+
 def migrate():
     print("--- Starting Migration to Turso ---")
     
@@ -40,7 +44,12 @@ def migrate():
         return
 
     # 4. Get Tables
-    tables = local_conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name != 'sqlite_sequence'").fetchall()
+    # The search index (FTS5 table + its shadow tables and search_index_keys) is rebuilt on the remote below instead of copied
+    tables = local_conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name != 'sqlite_sequence' AND name NOT LIKE ?",
+        (f"{SEARCH_TABLE}%",)
+    ).fetchall()
+    copied = [table_row["name"] for table_row in tables]
     
     for table_row in tables:
         table_name = table_row["name"]
@@ -62,6 +71,18 @@ def migrate():
             except Exception as e:
                 print(f"  - Schema error: {e}")
 
+        # Copy indexes (e.g. idx_news_status) - sqlite_master keeps them separately from the table
+        indexes = local_conn.execute("SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL", (table_name,)).fetchall()
+        for index_row in indexes:
+            index_sql = index_row["sql"]
+            if "IF NOT EXISTS" not in index_sql.upper():
+                index_sql = index_sql.replace("CREATE INDEX", "CREATE INDEX IF NOT EXISTS", 1).replace("CREATE UNIQUE INDEX", "CREATE UNIQUE INDEX IF NOT EXISTS", 1)
+            try:
+                remote_conn.execute(index_sql)
+                print(f"  - Index ensured: {index_row['name']}")
+            except Exception as e:
+                print(f"  - Index error ({index_row['name']}): {e}")
+
         # Get Data
         rows = local_conn.execute(f"SELECT * FROM {table_name}").fetchall()
         if not rows:
@@ -87,6 +108,26 @@ def migrate():
         remote_conn.commit()
         print("  - Data copied.")
 
+    # 5. Search index: create it with its sync triggers, then index the copied rows
+    print(f"\nRebuilding {SEARCH_TABLE}...")
+    try:
+        remote_conn.execute(SEARCH_CREATE_SQL)
+        remote_conn.execute(SEARCH_KEYS_CREATE_SQL)
+        remote_conn.execute(f"DELETE FROM {SEARCH_TABLE}")
+        remote_conn.execute(f"DELETE FROM {SEARCH_KEYS_TABLE}")
+        for kind, (table, *_) in SEARCH_SOURCES.items():
+            if table not in copied:
+                continue
+            for name, create_sql in search_triggers(kind):
+                remote_conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                remote_conn.execute(create_sql)
+            for sql in search_fill_sql(kind):
+                remote_conn.execute(sql)
+        remote_conn.commit()
+        print("  - Search index rebuilt.")
+    except Exception as e:
+        print(f"  - Search index error: {e}")
+
     print("\n--- Migration Complete ---")
     local_conn.close()
     remote_conn.close()
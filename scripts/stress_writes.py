@@ -0,0 +1,166 @@
+"""
+Stress test for concurrent submissions on the local SQLite backend.
+
+Starts --processes worker processes (like several uvicorn workers sharing db/glimprint.db), each
+running the app in-process with --submitters concurrent clients that POST publication and news
+submissions back to back. Runs once with the single-writer queue (DB_WRITE_QUEUE=1: group commits,
+retry with backoff on SQLITE_BUSY) and once with every request committing on its own connection
+(DB_WRITE_QUEUE=0), against the same fresh synthetic database, and reports for each:
+  - submissions/s, and latency percentiles of a submission request
+  - failed submissions (the form came back with an error, e.g. "database is locked")
+  - commits issued by the writer queues (fewer commits than writes = group commit at work)
+  - whether every successful submission is in the database
+
+Usage: python scripts/stress_writes.py [--processes 2] [--submitters 20] [--per-submitter 25]
+                                       [--modes queue,direct]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "scripts"))
+
+# Never write to the production database
+os.environ["TURSO_DATABASE_URL"] = ""
+os.environ["TURSO_AUTH_TOKEN"] = ""
+os.environ["DB_REPLICA_PATH"] = ""
+
+SUCCESS_MARKER = b"Submission Received"
+
+
+def build_db(path):
+    import update_schema
+    update_schema.DB_PATH = Path(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        update_schema.update_schema()
+
+
+async def asgi_post(app, path, form):
+    """Minimal in-process form POST, so the stress test needs no HTTP client library."""
+    body = urlencode(form).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"stress"), (b"content-type", b"application/x-www-form-urlencoded")],
+        "client": ("127.0.0.1", 0), "server": ("stress", 80),
+    }
+    status, chunks = None, []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def submission(process, submitter, i):
+    # Titles are unique: news slugs are the title plus a timestamp in seconds
+    title = f"Stress {process}-{submitter}-{i}"
+    if i % 2:
+        return "/submit/news", {"title": title, "date": "2024-06-01", "body": "<p>Stress test submission</p>" * 10}
+    return "/submit/publications", {"title": title, "authors": "Stress Tester", "description": "Stress test submission", "year": "2024"}
+
+
+def run_process(process, db_path, use_queue, submitters, per_submitter):
+    """One 'uvicorn worker': the app in-process with its own pool and writer queue."""
+    import app.database as database
+    from app.main import app
+
+    database.DB_PATH = Path(db_path)
+    database.WRITE_QUEUE_ENABLED = use_queue
+    latencies, failures = [], []
+
+    async def submitter(n):
+        for i in range(per_submitter):
+            path, form = submission(process, n, i)
+            start = time.perf_counter()
+            status, body = await asgi_post(app, path, form)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200 or SUCCESS_MARKER not in body:
+                failures.append(f"{path} -> {status}")
+
+    async def run():
+        await asyncio.gather(*[submitter(n) for n in range(submitters)])
+
+    asyncio.run(run())
+    stats = database.get_write_queue().stats() if use_queue else {}
+    database.close_write_queue()
+    database.close_pool()
+    return latencies, failures, stats
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def stress(mode, args, tmp_dir):
+    db_path = Path(tmp_dir) / f"{mode}.db"
+    build_db(db_path)
+    jobs = [(p, str(db_path), mode == "queue", args.submitters, args.per_submitter) for p in range(args.processes)]
+
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+        results = pool.starmap(run_process, jobs)
+    elapsed = time.perf_counter() - start
+
+    latencies = [ms for r in results for ms in r[0]]
+    failures = [f for r in results for f in r[1]]
+    writes = sum(r[2].get("writes", 0) for r in results)
+    commits = sum(r[2].get("batches", 0) for r in results)
+    retries = sum(r[2].get("retries", 0) for r in results)
+
+    conn = sqlite3.connect(db_path)
+    stored = sum(conn.execute(f"SELECT COUNT(*) FROM {t} WHERE title LIKE 'Stress %'").fetchone()[0] for t in ("news", "publications"))
+    conn.close()
+
+    succeeded = len(latencies) - len(failures)
+    print(f"\n{mode}: {len(latencies)} submissions in {elapsed:.1f} s (includes process start-up)")
+    print(f"  throughput      {len(latencies) / elapsed:8.0f} submissions/s")
+    print(f"  latency         p50={statistics.median(latencies):7.1f} ms  p99={percentile(latencies, 99):7.1f} ms  max={max(latencies):7.1f} ms")
+    print(f"  failed          {len(failures)}" + (f"  (e.g. {failures[0]})" if failures else ""))
+    if mode == "queue":
+        print(f"  commits         {commits} for {writes} writes ({writes / max(commits, 1):.1f} per commit), {retries} busy retries")
+    print(f"  stored          {stored} of {succeeded} successful submissions" + ("" if stored == succeeded else "  MISMATCH"))
+    return stored == succeeded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent submitters against the local SQLite backend, with and without the writer queue.")
+    parser.add_argument("--processes", type=int, default=2, help="worker processes sharing the database file")
+    parser.add_argument("--submitters", type=int, default=20, help="concurrent submitters per process")
+    parser.add_argument("--per-submitter", type=int, default=25, help="submissions each submitter sends")
+    parser.add_argument("--modes", default="queue,direct")
+    args = parser.parse_args()
+
+    print(f"{args.processes} processes x {args.submitters} submitters x {args.per_submitter} submissions")
+    ok = True
+    with tempfile.TemporaryDirectory(prefix="glimprint-stress-") as tmp_dir:
+        for mode in args.modes.split(","):
+            ok = stress(mode.strip(), args, tmp_dir) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()